@@ -4,7 +4,7 @@
 {
     "name": "Event tournament",
     "summary": "Implement tournaments in Odoo events",
-    "version": "16.0.1.0.0",
+    "version": "16.0.1.1.0",
     "license": "AGPL-3",
     "author": "Simone Rubino",
     "website": "https://github.com/Daemo00/odoo-modules/tree/16.0/event_tournament",
@@ -34,9 +34,13 @@
         "views/event_registration_view.xml",
         "views/event_tournament_view.xml",
         "views/event_tournament_court_view.xml",
+        "views/event_tournament_court_slot_view.xml",
         "views/event_tournament_match_view.xml",
         "views/event_tournament_mode_view.xml",
         "views/event_tournament_team_view.xml",
+        "views/res_config_settings_view.xml",
+        "wizards/event_tournament_reschedule_views.xml",
+        "wizards/event_tournament_simulation_views.xml",
         "wizards/import_csv_bv4w_views.xml",
     ],
 }
@@ -3,10 +3,15 @@
 from . import event_event
 from . import event_registration
 from . import event_tournament
+from . import event_tournament_availability
 from . import event_tournament_court
+from . import event_tournament_court_slot
 from . import event_tournament_match
 from . import event_tournament_match_mode
 from . import event_tournament_match_set
 from . import event_tournament_match_set_result
+from . import event_tournament_match_slot
 from . import event_tournament_match_team_stats
+from . import event_tournament_schedule_version
 from . import event_tournament_team
+from . import res_config_settings
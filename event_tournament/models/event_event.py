@@ -13,3 +13,18 @@ class EventEvent(models.Model):
     court_ids = fields.One2many(
         comodel_name="event.tournament.court", inverse_name="event_id", string="Courts"
     )
+
+    def generate_tournaments_matches(self):
+        """
+        Generate the matches of all the tournaments of the events,
+        scheduling them together on the shared courts.
+        """
+        return self.mapped("tournament_ids").generate_matches_together()
+
+    def generate_view_tournaments_matches(self):
+        self.ensure_one()
+        self.generate_tournaments_matches()
+        action = self.env.ref("event_tournament.event_tournament_match_action")
+        action = action.read()[0]
+        action["domain"] = [("event_id", "=", self.id)]
+        return action
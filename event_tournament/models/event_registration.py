@@ -22,6 +22,18 @@ class EventRegistration(models.Model):
         column1="match_id",
         column2="component_id",
     )
+    tournament_availability_ids = fields.One2many(
+        comodel_name="event.tournament.availability",
+        inverse_name="component_id",
+        string="Availability windows",
+        help="When the component can play matches. "
+        "If there are none, the component can always play.",
+    )
+    tournament_slot_ids = fields.One2many(
+        comodel_name="event.tournament.match.slot",
+        inverse_name="component_id",
+        string="Matches slots",
+    )
     teams_number = fields.Integer(
         compute="_compute_teams_number",
         store=True,
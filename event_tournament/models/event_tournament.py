@@ -1,20 +1,48 @@
 #  Copyright 2020 ~ 2023 Simone Rubino <daemo00@gmail.com>
 #  License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+import dataclasses
 import itertools
+import multiprocessing
+import os
 import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from datetime import timedelta
-from functools import reduce
 from math import comb
 
 from more_itertools import grouper
 
 from odoo import _, api, fields, models
 from odoo.exceptions import UserError, ValidationError
-from odoo.tools import logging
+from odoo.fields import Command
+from odoo.tools import config, format_datetime, logging
 from odoo.tools.safe_eval import safe_eval
 
+from ..tools import scheduling
+
 _logger = logging.getLogger(__name__)
 
+SCHEDULING_WORKERS_PARAMETER = "event_tournament.scheduling_workers"
+RANDOM_SEED_MAX = 2**31 - 1
+# Tournament fields the candidate matches and their scheduling depend on
+SCHEDULING_INPUT_FIELDS = [
+    "start_datetime",
+    "end_datetime",
+    "match_duration",
+    "match_warm_up_duration",
+    "min_rest_duration",
+    "court_ids",
+    "tournament_format",
+    "match_teams_nbr",
+    "share_components",
+    "reset_matches_before_generation",
+    "randomize_matches_generation",
+    "random_seed",
+    "qualified_per_pool",
+    "playoff_format",
+]
+
 
 class EventTournament(models.Model):
     _name = "event.tournament"
@@ -34,8 +62,21 @@ class EventTournament(models.Model):
         inverse_name="tournament_id",
         string="Matches",
     )
+    schedule_version_ids = fields.One2many(
+        comodel_name="event.tournament.schedule.version",
+        inverse_name="tournament_id",
+        string="Schedule versions",
+    )
     match_count_estimated = fields.Integer(
-        string="Estimated match count", compute="_compute_match_count_estimated"
+        string="Estimated match count",
+        compute="_compute_match_count_estimated",
+        help="Matches between the teams of this tournament and its sub tournaments.",
+    )
+    match_tuples_count = fields.Integer(
+        string="Possible matches count",
+        compute="_compute_match_tuples_count",
+        store=True,
+        help="Matches between the teams of this tournament.",
     )
     match_count = fields.Integer(
         compute="_compute_match_count",
@@ -98,17 +139,81 @@ class EventTournament(models.Model):
     match_warm_up_duration = fields.Float(
         string="Match warm-up duration",
     )
+    min_rest_duration = fields.Float(
+        string="Minimum rest",
+        help="Minimum time between two matches of the same component.\n"
+        "Only used when scheduling matches in memory.",
+    )
     match_teams_nbr = fields.Integer(
         string="Teams per match",
         help="Number of teams per match",
         default=2,
     )
+    tournament_format = fields.Selection(
+        selection=[
+            ("combinations", "All combinations"),
+            ("round_robin", "Round robin"),
+            ("swiss", "Swiss system"),
+            ("knockout", "Single elimination"),
+            ("double_elimination", "Double elimination"),
+        ],
+        string="Format",
+        default="combinations",
+        required=True,
+        help="All combinations: every possible match between the teams.\n"
+        "Round robin: each team meets every other team once, "
+        "in rounds where each team plays at most once.\n"
+        "Swiss system: each generation creates the next round, "
+        "pairing teams with similar standings that did not meet yet.\n"
+        "Single and double elimination: teams are seeded in a bracket, "
+        "matches are created as soon as their teams are known; "
+        "in double elimination the final is a single match, "
+        "that is not played again if the team "
+        "coming from the winners bracket loses it.",
+    )
     randomize_matches_generation = fields.Boolean(
         string="Randomize", help="Randomize matches generation"
     )
+    random_seed = fields.Integer(
+        string="Seed",
+        default=lambda self: random.randrange(RANDOM_SEED_MAX),
+        help="Random choices of teams and matches generation "
+        "are the same for the same seed.",
+    )
     reset_matches_before_generation = fields.Boolean(
         string="Reset", help="Delete not done matches before generation", default=True
     )
+    scheduling_mode = fields.Selection(
+        selection=[
+            ("memory", "In memory"),
+            ("savepoint", "Match by match"),
+        ],
+        default="memory",
+        required=True,
+        help="In memory: the whole schedule is computed before creating "
+        "all the matches at once.\n"
+        "Match by match: each match is created and validated "
+        "in every available time slot until it is valid.",
+    )
+    scheduling_time_budget = fields.Float(
+        string="Rescheduling time budget",
+        default=10,
+        help="Seconds spent moving already scheduled matches "
+        "to make room for a match that does not fit anywhere.\n"
+        "Only used when scheduling matches in memory, 0 disables it.",
+    )
+    scheduling_weight = fields.Float(
+        default=1,
+        help="When scheduling tournaments together, "
+        "share of the time slots given to this tournament "
+        "with respect to the others.",
+    )
+    optimization_time_budget = fields.Float(
+        string="Optimization time budget",
+        default=10,
+        help="Seconds spent improving the schedule of the matches "
+        "that are not done.",
+    )
     parent_id = fields.Many2one(
         comodel_name="event.tournament", string="Parent tournament"
     )
@@ -117,6 +222,29 @@ class EventTournament(models.Model):
         inverse_name="parent_id",
         string="Sub tournaments",
     )
+    qualified_per_pool = fields.Integer(
+        string="Qualified teams per pool",
+        default=2,
+        help="Best teams of each sub tournament joining the playoff.",
+    )
+    playoff_format = fields.Selection(
+        selection=[
+            ("knockout", "Single elimination"),
+            ("double_elimination", "Double elimination"),
+            ("round_robin", "Round robin"),
+        ],
+        default="knockout",
+        required=True,
+        help="Format of the playoff between the qualified teams of the "
+        "sub tournaments.",
+    )
+    playoff_tournament_id = fields.Many2one(
+        comodel_name="event.tournament",
+        string="Playoff",
+        readonly=True,
+        copy=False,
+        help="Tournament between the qualified teams of the sub tournaments.",
+    )
     notes = fields.Text()
 
     _sql_constraints = [
@@ -125,6 +253,11 @@ class EventTournament(models.Model):
             "CHECK(0 < min_components)",
             "The minimum number of components must be positive.",
         ),
+        (
+            "check_scheduling_weight",
+            "CHECK(scheduling_weight > 0)",
+            "The scheduling weight must be positive.",
+        ),
         (
             "check_number_max_min_components",
             "CHECK(min_components <= max_components)",
@@ -146,15 +279,46 @@ class EventTournament(models.Model):
             tournament.match_count = len(tournament.match_ids)
 
     @api.depends(
+        "tournament_format",
         "team_ids",
+        "team_ids.component_ids",
         "match_teams_nbr",
+        "share_components",
+    )
+    def _compute_match_tuples_count(self):
+        for tournament in self:
+            teams_nbr = len(tournament.team_ids)
+            match_teams_nbr = tournament.match_teams_nbr
+            if match_teams_nbr < 1:
+                match_tuples_count = 0
+            elif tournament.tournament_format == "swiss":
+                # Only the next round is generated
+                match_tuples_count = teams_nbr // 2
+            elif tournament.tournament_format == "knockout":
+                # Each match eliminates a team
+                match_tuples_count = max(teams_nbr - 1, 0)
+            elif tournament.tournament_format == "double_elimination":
+                # Each match is a defeat, teams are eliminated by two defeats
+                match_tuples_count = max(2 * teams_nbr - 2, 0)
+            elif not tournament.share_components:
+                match_tuples_count = comb(teams_nbr, match_teams_nbr)
+            else:
+                match_tuples_count = sum(
+                    1 for _match_teams in tournament.get_match_tuples_single()
+                )
+            tournament.match_tuples_count = match_tuples_count
+
+    @api.depends(
+        "match_tuples_count",
         "child_ids",
-        "child_ids.team_ids",
-        "child_ids.match_teams_nbr",
+        "child_ids.match_tuples_count",
     )
     def _compute_match_count_estimated(self):
         for tournament in self:
-            tournament.match_count_estimated = len(list(tournament.get_match_tuples()))
+            all_tournaments = tournament | tournament.get_children()
+            tournament.match_count_estimated = sum(
+                all_tournaments.mapped("match_tuples_count")
+            )
 
     @api.depends(
         "event_id.registration_ids",
@@ -205,27 +369,629 @@ class EventTournament(models.Model):
 
     def generate_matches(self):
         """
-        Generate matches for the current tournament.
-        Matches are generated using `itertools.combinations` built-in
-        and they are assigned a time slot in the following fashion:
+        Generate matches for the current tournament and its sub tournaments.
 
-            1. Tournament start
-            2. Court
+        The teams of the matches depend on the format of each tournament,
+        see :meth:`get_match_tuples_single`.
+        If matches are reset before generation,
+        the current schedule is saved as a version
+        and the matches that are not done are deleted.
+        Then the matches are created and scheduled,
+        see :meth:`schedule_matches`.
         """
         self.ensure_one()
 
-        matches_teams = self.get_match_tuples()
-        if self.randomize_matches_generation:
-            random.shuffle(matches_teams)
+        self.get_children().save_knockout_seeds()
+        matches_teams = self.iter_match_tuples()
         if self.reset_matches_before_generation:
+            if self.get_children().mapped("match_ids"):
+                self.save_schedule_version(_("Before generation"))
             matches_teams = self.reset_matches(matches_teams)
+        return self.schedule_matches(matches_teams)
+
+    def save_schedule_version(self, name=None):
+        """
+        Save the schedule of the matches of this tournament
+        and its sub tournaments, so that it can be restored later.
+
+        Only the most recent versions are kept,
+        according to the limit in the settings.
+        """
+        self.ensure_one()
+        version_model = self.env["event.tournament.schedule.version"]
+        matches = self.get_children().mapped("match_ids")
+        version = version_model.create(
+            {
+                "tournament_id": self.id,
+                "name": name or fields.Datetime.to_string(fields.Datetime.now()),
+                "snapshot": version_model.get_snapshot(matches),
+            }
+        )
+        version_model.unlink_old_versions(self)
+        return version
+
+    def action_save_schedule_version(self):
+        self.ensure_one()
+        self.save_schedule_version()
+
+    def schedule_matches(self, matches_teams):
+        """
+        Create and schedule a match for each tuple of teams in `matches_teams`,
+        according to the scheduling mode of the tournament.
+        """
+        self.ensure_one()
+        if self.scheduling_mode == "savepoint":
+            matches_teams = list(matches_teams)
+            if self.randomize_matches_generation:
+                self.get_random().shuffle(matches_teams)
+            matches = self.generate_matches_savepoint(matches_teams)
+        else:
+            matches = self.generate_matches_in_memory(matches_teams)
+        return matches
+
+    def raise_scheduling_error(self, match_teams, last_error=False):
+        error_message = _("Scheduling impossibru for a match between ") + ", ".join(
+            team.display_name for team in match_teams
+        )
+        if last_error:
+            error_message += (
+                "\n" + _("Last match could not be scheduled due to:\n") + last_error
+            )
+        raise UserError(error_message)
+
+    def get_scheduling_value(self, field_name):
+        """
+        Value of `field_name` used for scheduling matches:
+        the one of the variant being simulated, if any,
+        see :meth:`simulate_matches`.
+        """
+        variant = self.env.context.get("scheduling_variant") or {}
+        if field_name not in variant:
+            return self[field_name]
+        value = variant[field_name]
+        field = self._fields[field_name]
+        if field.type == "many2many":
+            value = self.env[field.comodel_name].browse(value)
+        return value
+
+    def get_scheduling_spec(self):
+        """Plain data describing how matches of this tournament are scheduled."""
+        self.ensure_one()
+        match_duration = self.get_match_duration()
+        max_start, min_start = self.get_max_min_start(match_duration)
+        courts = self.get_courts()
+        return scheduling.TournamentSpec(
+            id=self.id,
+            court_ids=tuple(courts.ids),
+            duration=match_duration,
+            min_start=min_start,
+            max_start=max_start,
+            min_rest=timedelta(hours=self.get_scheduling_value("min_rest_duration")),
+        )
+
+    def get_busy_intervals(self, courts, components, exclude_matches=None):
+        """
+        Intervals of the existing matches using `courts` or `components`.
+
+        :param exclude_matches: existing matches that are ignored.
+        :return: a list of (court ID, components IDs, start, end, match ID)
+            tuples, see :meth:`~..tools.scheduling.Scheduler.add_busy`.
+        """
+        exclude_matches_ids = exclude_matches.ids if exclude_matches else []
+        busy = []
+        for match_values in self.env["event.tournament.match"].search_read(
+            [
+                ("court_id", "in", courts.ids),
+                ("id", "not in", exclude_matches_ids),
+                ("time_scheduled_start", "!=", False),
+                ("time_scheduled_end", "!=", False),
+            ],
+            ["court_id", "time_scheduled_start", "time_scheduled_end"],
+            load=None,
+        ):
+            busy.append(
+                (
+                    match_values["court_id"],
+                    (),
+                    match_values["time_scheduled_start"],
+                    match_values["time_scheduled_end"],
+                    match_values["id"],
+                )
+            )
+        for slot_values in self.env["event.tournament.match.slot"].search_read(
+            [
+                ("component_id", "in", components.ids),
+                ("match_id", "not in", exclude_matches_ids),
+                ("time_start", "!=", False),
+                ("time_end", "!=", False),
+            ],
+            ["match_id", "component_id", "time_start", "time_end"],
+            load=None,
+        ):
+            busy.append(
+                (
+                    False,
+                    (slot_values["component_id"],),
+                    slot_values["time_start"],
+                    slot_values["time_end"],
+                    slot_values["match_id"],
+                )
+            )
+        return busy
+
+    def get_scheduler(self, courts, components, exclude_matches=None):
+        """
+        Build a scheduler for `courts`,
+        aware of the existing matches using `courts` or `components`.
+
+        :param exclude_matches: existing matches that are ignored.
+        """
+        scheduler = scheduling.Scheduler(courts.get_scheduling_specs())
+        for court_id, component_ids, start, end, key in self.get_busy_intervals(
+            courts, components, exclude_matches=exclude_matches
+        ):
+            scheduler.add_busy(court_id, component_ids, start, end, key=key)
+        for component_id, windows in self.get_components_windows(components).items():
+            scheduler.set_component_windows(component_id, windows)
+        return scheduler
+
+    @api.model
+    def get_components_windows(self, components):
+        """Availability windows of the components having some."""
+        return self.env["event.tournament.availability"].get_windows(
+            "component_id", components
+        )
+
+    def get_scheduling_problem(self, candidates, specs=None, exclude_matches=None):
+        """
+        Plain data needed to schedule `candidates`
+        in the tournaments of `self`.
+
+        :param specs: mapping from tournament ID to its scheduling spec,
+            computed only when a candidate needs it if missing.
+        :param exclude_matches: existing matches that are ignored.
+        """
+        if specs is None:
+            specs = scheduling.SpecsCache(
+                lambda tournament_id: self.browse(tournament_id).get_scheduling_spec()
+            )
+        courts = self.env["event.tournament.court"].browse()
+        for tournament in self:
+            courts |= tournament.get_scheduling_value("court_ids")
+        components = self.mapped("team_ids.component_ids")
+        return scheduling.SchedulingProblem(
+            courts=courts.get_scheduling_specs(),
+            tournaments=specs,
+            candidates=candidates,
+            busy=self.get_busy_intervals(
+                courts, components, exclude_matches=exclude_matches
+            ),
+            components_windows=self.get_components_windows(components),
+            weights={
+                tournament.id: tournament.scheduling_weight for tournament in self
+            },
+            randomize=any(
+                tournament.get_scheduling_value("randomize_matches_generation")
+                for tournament in self
+            ),
+            time_budget=max(self.mapped("scheduling_time_budget"), default=0),
+            seed=",".join(
+                str(tournament.get_scheduling_value("random_seed"))
+                for tournament in self.sorted("id")
+            ),
+            inputs=self.get_scheduling_inputs(exclude_matches=exclude_matches),
+        )
+
+    def get_scheduling_inputs(self, exclude_matches=None):
+        """
+        Plain data the candidate matches of the tournaments in `self`
+        are generated from: settings, teams and their components,
+        existing matches and the results of done matches.
+
+        :param exclude_matches: existing matches that are ignored.
+        """
+        inputs = [self.env.context.get("scheduling_min_start")]
+        for tournament in self.sorted("id"):
+            values = []
+            for field_name in SCHEDULING_INPUT_FIELDS:
+                value = tournament.get_scheduling_value(field_name)
+                if isinstance(value, models.BaseModel):
+                    value = value.ids
+                values.append(value)
+            matches = tournament.match_ids
+            if exclude_matches:
+                matches -= exclude_matches
+            inputs.append(
+                (
+                    tournament.id,
+                    values,
+                    [
+                        (team.id, team.component_ids.ids, team.seed)
+                        for team in tournament.team_ids
+                    ],
+                    [
+                        (
+                            match.id,
+                            match.team_ids.ids,
+                            match.state,
+                            match.bracket,
+                            match.round_number,
+                            match.bracket_position,
+                            # Results of done matches change the next matches
+                            match.write_date if match.state == "done" else None,
+                        )
+                        for match in matches
+                    ],
+                )
+            )
+        return inputs
+
+    def get_independent_groups(self):
+        """
+        Split the tournaments in `self` into groups
+        that share no courts and no components,
+        so that each group can be scheduled on its own.
+        """
+        tournaments_resources = {}
+        for tournament in self:
+            tournaments_resources[tournament.id] = {
+                ("court", court_id)
+                for court_id in tournament.get_scheduling_value("court_ids").ids
+            } | {
+                ("component", component_id)
+                for component_id in tournament.team_ids.component_ids.ids
+            }
+        return [
+            self.browse(tournaments_ids)
+            for tournaments_ids in scheduling.independent_groups(tournaments_resources)
+        ]
+
+    @api.model
+    def get_scheduling_workers_nbr(self):
+        """
+        Number of processes that schedule independent tournaments in parallel,
+        see the settings.
+
+        Worker processes are forked from the server process,
+        which is only safe for a server running with prefork workers:
+        forking a multi-threaded server can deadlock the children
+        on locks held by other threads.
+        """
+        if not config["workers"]:
+            return 0
+        workers_nbr = int(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param(SCHEDULING_WORKERS_PARAMETER, default=0)
+            or 0
+        )
+        if workers_nbr < 0:
+            workers_nbr = os.cpu_count() or 1
+        return workers_nbr
+
+    def solve_in_parallel(self, groups, candidates, workers_nbr, exclude_matches=None):
+        """
+        Schedule `candidates` of each group of tournaments
+        in its own worker process.
+
+        Candidates are bucketed by group,
+        workers only receive plain data and the payloads are kept here,
+        see :func:`~..tools.scheduling.solve_cached`.
+
+        :return: a list of results of :func:`~..tools.scheduling.solve`.
+        """
+        groups_indexes = {
+            tournament.id: index
+            for index, group in enumerate(groups)
+            for tournament in group
+        }
+        groups_candidates = [[] for _group in groups]
+        for candidate in candidates:
+            tournament_id = candidate[3]
+            groups_candidates[groups_indexes[tournament_id]].append(candidate)
+
+        problems = []
+        for index, group in enumerate(groups):
+            group_candidates = groups_candidates[index]
+            if not group_candidates:
+                continue
+            specs = {
+                tournament_id: self.browse(tournament_id).get_scheduling_spec()
+                for tournament_id in {candidate[3] for candidate in group_candidates}
+            }
+            problems.append(
+                group.get_scheduling_problem(
+                    group_candidates, specs, exclude_matches=exclude_matches
+                )
+            )
+
+        def map_function(function, missing_problems):
+            if len(missing_problems) <= 1:
+                return [function(problem) for problem in missing_problems]
+            # Workers only compute, the cursor is only used in this process
+            missing_problems = [
+                dataclasses.replace(problem, candidates=list(problem.candidates))
+                for problem in missing_problems
+            ]
+            context = multiprocessing.get_context("fork")
+            with ProcessPoolExecutor(
+                max_workers=min(workers_nbr, len(missing_problems)),
+                mp_context=context,
+            ) as executor:
+                return list(executor.map(function, missing_problems))
+
+        return scheduling.solve_cached(problems, map_function=map_function)
+
+    def generate_matches_in_memory(self, matches_teams):
+        """
+        Schedule `matches_teams` in memory and create all the matches at once,
+        match constraints are only checked on the final batch.
+        """
+        return self.env["event.tournament.match"].create(
+            [
+                {
+                    "tournament_id": placement.tournament_id,
+                    "court_id": placement.court_id,
+                    "team_ids": [Command.set(placement.team_ids)],
+                    "time_scheduled_start": placement.start,
+                    "time_scheduled_end": placement.end,
+                    **round_values,
+                }
+                for (_match_teams, round_values), placement in self.plan_matches(
+                    matches_teams
+                )
+            ]
+        )
+
+    def plan_matches(self, matches_teams, exclude_matches=None):
+        """
+        Schedule `matches_teams` in memory, without writing anything.
+
+        Teams, components, courts and existing matches are loaded once.
+        Matches are scheduled from a bounded frontier of candidate matches.
+        When a match does not fit, scheduled matches are moved to make room
+        for it, within the rescheduling time budget.
+
+        Tournaments in `self` are scheduled together,
+        each one getting time slots according to its scheduling weight.
+        Groups of tournaments that share no courts and no components
+        are scheduled in parallel processes if enabled in the settings.
+
+        A schedule computed recently for the same inputs is reused,
+        see :func:`~..tools.scheduling.solve_cached`.
+
+        :param exclude_matches: existing matches that are ignored.
+        :return: a list of ((match teams, round values), placement) tuples,
+            see :class:`~..tools.scheduling.Placement`.
+        """
+        all_tournaments = self | self.get_children()
+        teams = all_tournaments.mapped("team_ids")
+        teams_tournament = {}
+        teams_components = {}
+        for team_values in teams.read(["tournament_id", "component_ids"], load=None):
+            teams_tournament[team_values["id"]] = team_values["tournament_id"]
+            teams_components[team_values["id"]] = frozenset(
+                team_values["component_ids"]
+            )
+
+        rounds_values = self.get_matches_round_values()
+
+        def candidates():
+            for match_teams in matches_teams:
+                teams_ids = tuple(team.id for team in match_teams)
+                components_ids = frozenset().union(
+                    *(teams_components[team_id] for team_id in teams_ids)
+                )
+                round_values = rounds_values.get(frozenset(teams_ids), {})
+                round_number = round_values.get("round_number", 0)
+                tournament_id = teams_tournament[teams_ids[0]]
+                yield (
+                    (teams_ids, (match_teams, round_values)),
+                    components_ids,
+                    round_number,
+                    tournament_id,
+                )
+
+        workers_nbr = self.get_scheduling_workers_nbr()
+        groups = all_tournaments.get_independent_groups() if workers_nbr > 1 else []
+        if len(groups) > 1:
+            results = all_tournaments.solve_in_parallel(
+                groups, candidates(), workers_nbr, exclude_matches=exclude_matches
+            )
+        else:
+            problem = all_tournaments.get_scheduling_problem(
+                candidates(), exclude_matches=exclude_matches
+            )
+            results = scheduling.solve_cached([problem])
 
+        placements = []
+        for group_placements, unplaced in results:
+            if unplaced is not None:
+                match_teams, _round_values = unplaced
+                self.raise_scheduling_error(match_teams)
+            placements.extend(group_placements)
+        return placements
+
+    def simulate_matches(self):
+        """
+        Schedule the matches that :meth:`generate_matches` would create,
+        without writing anything.
+
+        Settings can be overridden with a ``scheduling_variant`` context key:
+        a dictionary mapping tournament fields
+        (such as ``match_duration`` or ``court_ids``) to their simulated value.
+
+        :return: a dictionary with
+            the proposed ``matches``: a list of dictionaries of match values,
+            and the ``metrics`` of :func:`~..tools.scheduling.get_metrics`.
+        """
+        self.ensure_one()
+        matches_teams = self.iter_match_tuples()
+        exclude_matches = self.env["event.tournament.match"].browse()
+        if self.reset_matches_before_generation:
+            exclude_matches, matches_teams = self.skip_done_matches(matches_teams)
+        placements = self.plan_matches(matches_teams, exclude_matches=exclude_matches)
+        return {
+            "matches": [
+                {
+                    "tournament_id": placement.tournament_id,
+                    "court_id": placement.court_id,
+                    "team_ids": list(placement.team_ids),
+                    "time_scheduled_start": placement.start,
+                    "time_scheduled_end": placement.end,
+                    **round_values,
+                }
+                for (_match_teams, round_values), placement in placements
+            ],
+            "metrics": scheduling.get_metrics(
+                [placement for _values, placement in placements]
+            ),
+        }
+
+    def generate_matches_together(self):
+        """
+        Generate and schedule the matches of the tournaments in `self`
+        and their sub tournaments together,
+        sharing courts and components in a single in-memory schedule.
+
+        Matches are always scheduled in memory.
+        """
+        all_tournaments = self | self.get_children()
+        all_tournaments.save_knockout_seeds()
+        matches_teams = all_tournaments.iter_match_tuples()
+        reset_tournaments = all_tournaments.filtered("reset_matches_before_generation")
+        if reset_tournaments:
+            for tournament in self:
+                tournaments = tournament.get_children()
+                if (tournaments & reset_tournaments) and tournaments.mapped(
+                    "match_ids"
+                ):
+                    tournament.save_schedule_version(_("Before generation"))
+            matches_teams = reset_tournaments.reset_matches(matches_teams)
+        return all_tournaments.generate_matches_in_memory(matches_teams)
+
+    @api.model
+    def add_placements(self, scheduler, matches):
+        """
+        Add the scheduled `matches` to `scheduler`
+        as placements that can be moved.
+
+        :return: a dictionary mapping match IDs to their placement.
+        """
+        specs = {}
+        placements = {}
+        for match_values in matches.read(
+            [
+                "tournament_id",
+                "team_ids",
+                "component_ids",
+                "court_id",
+                "time_scheduled_start",
+                "time_scheduled_end",
+            ],
+            load=None,
+        ):
+            tournament_id = match_values["tournament_id"]
+            if tournament_id not in specs:
+                specs[tournament_id] = self.browse(tournament_id).get_scheduling_spec()
+            placement = scheduling.Placement(
+                tournament_id=tournament_id,
+                team_ids=tuple(match_values["team_ids"]),
+                court_id=match_values["court_id"],
+                start=match_values["time_scheduled_start"],
+                end=match_values["time_scheduled_end"],
+                component_ids=frozenset(match_values["component_ids"]),
+                tournament=specs[tournament_id],
+            )
+            scheduler.add_placement(placement)
+            placements[match_values["id"]] = placement
+        return placements
+
+    def optimize_schedule(self):
+        """
+        Improve the schedule of the matches of this tournament
+        and its sub tournaments that are not done,
+        within the optimization time budget.
+
+        Done matches and matches of other tournaments are never moved.
+
+        :return: the (initial cost, best cost) tuple
+            of :class:`~..tools.scheduling.ScheduleOptimizer`.
+        """
+        self.ensure_one()
+        all_tournaments = self | self.get_children()
+        matches = all_tournaments.mapped("match_ids").filtered(
+            lambda m: m.state != "done"
+            and m.court_id
+            and m.time_scheduled_start
+            and m.time_scheduled_end
+        )
+        scheduler = self.get_scheduler(
+            all_tournaments.mapped("court_ids"),
+            all_tournaments.mapped("team_ids.component_ids"),
+            exclude_matches=matches,
+        )
+        placements = self.add_placements(scheduler, matches)
+        optimizer = scheduling.ScheduleOptimizer(scheduler, placements.values())
+        deadline = time.monotonic() + self.optimization_time_budget
+        initial_cost, best_cost = optimizer.run(deadline)
+        if best_cost < initial_cost:
+            matches.write_schedule(
+                [
+                    (
+                        matches.browse(match_id),
+                        placement.court_id,
+                        placement.start,
+                        placement.end,
+                    )
+                    for match_id, placement in placements.items()
+                ]
+            )
+        return initial_cost, best_cost
+
+    def action_optimize_schedule(self):
+        self.ensure_one()
+        initial_cost, best_cost = self.optimize_schedule()
+        if best_cost < initial_cost:
+            message = _("Schedule cost reduced from {initial_cost} to {best_cost}.")
+        else:
+            message = _("No better schedule found.")
+        return {
+            "type": "ir.actions.client",
+            "tag": "display_notification",
+            "params": {
+                "title": _("Schedule optimization"),
+                "message": message.format(
+                    initial_cost=round(initial_cost), best_cost=round(best_cost)
+                ),
+                "type": "success" if best_cost < initial_cost else "info",
+            },
+        }
+
+    def generate_matches_savepoint(self, matches_teams):
+        """
+        Schedule `matches_teams` one by one:
+        each match is created in a savepoint and validated by match constraints
+        until a valid time slot is found.
+        """
         team_model = self.env["event.tournament.team"]
         match_model = self.env["event.tournament.match"]
+        slot_model = self.env["event.tournament.court.slot"]
         matches = match_model.browse()
+        rounds_values = self.get_matches_round_values()
+
+        def get_round_values(match_teams):
+            return rounds_values.get(frozenset(t.id for t in match_teams), {})
+
+        def get_round_number(match_teams):
+            return get_round_values(match_teams).get("round_number", 0)
+
+        # Matches are popped from the end: lowest rounds go last
+        matches_teams.sort(key=get_round_number, reverse=True)
         while matches_teams:
             match_teams = matches_teams.pop()
             teams_ids = [t.id for t in match_teams]
+            round_values = get_round_values(match_teams)
             tournament = team_model.browse(teams_ids).mapped("tournament_id")
             match_duration = tournament.get_match_duration()
             max_start, min_start = tournament.get_max_min_start(match_duration)
@@ -236,6 +1002,12 @@ class EventTournament(models.Model):
             # Try to schedule the match as soon as possible
             last_error = False
             while curr_start <= max_start:
+                # Skip the time when no court is free
+                curr_start = slot_model.get_next_free_start(
+                    courts, match_duration, curr_start
+                )
+                if curr_start is None or curr_start > max_start:
+                    break
                 # Try to put this match in a court at curr_start
                 for court in courts:
                     try:
@@ -248,6 +1020,7 @@ class EventTournament(models.Model):
                                     "team_ids": teams_ids,
                                     "time_scheduled_start": curr_start,
                                     "time_scheduled_end": curr_start + match_duration,
+                                    **round_values,
                                 }
                             )
                     except ValidationError as ve:
@@ -269,18 +1042,9 @@ class EventTournament(models.Model):
                 else:
                     curr_start = curr_start + match_duration
             if not match:
-                error_message = _(
-                    "Scheduling impossibru for a match between "
-                ) + ", ".join(team.display_name for team in match_teams)
-                if last_error:
-                    error_message += (
-                        "\n"
-                        + _("Last match could not be scheduled due to:\n")
-                        + last_error
-                    )
-                raise UserError(error_message)
-            max_start = max(max_start, match.time_scheduled_end)
-            # Try to not make components play two matches in a row:
+                self.raise_scheduling_error(match_teams, last_error=last_error)
+            # Keep playing rounds in order
+            # and try to not make components play two matches in a row:
             # rearrange matches_teams so that components
             # in the latest match are the first ones
             # (popped as late as possible)
@@ -289,14 +1053,115 @@ class EventTournament(models.Model):
                 components = self.env["event.registration"].browse()
                 for team in current_match:
                     components |= team.component_ids
-                return not (components & last_match.component_ids)
+                return (
+                    -get_round_number(current_match),
+                    not (components & last_match.component_ids),
+                )
 
             matches_teams.sort(key=common_components)
 
         return matches
 
+    def get_busiest_team_matches_nbr(self):
+        """Lower bound of the matches played by the busiest component."""
+        self.ensure_one()
+        teams_nbr = len(self.team_ids)
+        match_teams_nbr = self.match_teams_nbr
+        tournament_format = self.tournament_format
+        if teams_nbr < 2 or match_teams_nbr < 1:
+            return 0
+        if tournament_format == "swiss":
+            return 1
+        if tournament_format in ("knockout", "double_elimination"):
+            # The finalists of the winners bracket play every round
+            # but the best seeds might skip the first one
+            return teams_nbr.bit_length() - 1
+        if self.share_components:
+            # Teams sharing components do not play each other
+            # and a component plays the matches of all its teams
+            return scheduling.busiest_component_matches_nbr(
+                [team.component_ids.ids for team in self.team_ids],
+                match_teams_nbr,
+            )
+        return comb(teams_nbr - 1, match_teams_nbr - 1)
+
+    def get_schedule_bounds(self):
+        """
+        Lower bounds of the schedule of this tournament and its sub tournaments,
+        computed from their settings only:
+        no match is generated, existing matches are ignored.
+
+        :return: a dictionary mapping each tournament
+            to its :class:`~..tools.scheduling.ScheduleBounds`.
+        """
+        schedule_bounds = {}
+        for tournament in self | self.get_children():
+            spec = tournament.get_scheduling_spec()
+            courts = tournament.get_courts()
+            schedule_bounds[tournament] = scheduling.schedule_bounds(
+                spec,
+                courts.get_scheduling_specs(),
+                tournament.match_tuples_count,
+                busiest_matches_nbr=tournament.get_busiest_team_matches_nbr(),
+            )
+        return schedule_bounds
+
+    def action_check_schedule(self):
+        """Notify whether the matches can fit and when they can end at the earliest."""
+        self.ensure_one()
+        messages = []
+        feasible = True
+        for tournament, bounds in self.get_schedule_bounds().items():
+            tourn_name = tournament.display_name
+            if bounds.courts_end is None:
+                messages.append(
+                    _(
+                        "{tourn_name}: {matches_nbr} matches "
+                        "do not fit in {slots_nbr} court slots."
+                    ).format(
+                        tourn_name=tourn_name,
+                        matches_nbr=bounds.matches_nbr,
+                        slots_nbr=bounds.slots_nbr,
+                    )
+                )
+            if bounds.components_end is None:
+                messages.append(
+                    _(
+                        "{tourn_name}: a team can't play "
+                        "its {busiest_matches_nbr} matches in time."
+                    ).format(
+                        tourn_name=tourn_name,
+                        busiest_matches_nbr=bounds.busiest_matches_nbr,
+                    )
+                )
+            if bounds.feasible:
+                messages.append(
+                    _(
+                        "{tourn_name}: {matches_nbr} matches "
+                        "in {slots_nbr} court slots, "
+                        "ending not before {min_end}."
+                    ).format(
+                        tourn_name=tourn_name,
+                        matches_nbr=bounds.matches_nbr,
+                        slots_nbr=bounds.slots_nbr,
+                        min_end=format_datetime(self.env, bounds.min_end),
+                    )
+                )
+            else:
+                feasible = False
+        return {
+            "type": "ir.actions.client",
+            "tag": "display_notification",
+            "params": {
+                "title": _("Schedule check"),
+                "message": "\n".join(messages),
+                "type": "success" if feasible else "warning",
+                "sticky": not feasible,
+            },
+        }
+
     def get_courts(self):
-        courts = self.court_ids
+        courts = self.get_scheduling_value("court_ids")
         if not courts:
             raise UserError(
                 _(
@@ -315,24 +1180,249 @@ class EventTournament(models.Model):
             return children
         return self + children.get_children(depth - 1)
 
+    def get_round_robin_rounds(self):
+        """
+        Rounds of the round robin between the teams of this tournament.
+
+        :return: a list of rounds, each round is a list of pairs of teams.
+        """
+        self.ensure_one()
+        teams = self.team_ids
+        rounds = []
+        for round_pairs in scheduling.circle_rounds(len(teams)):
+            round_teams = [(teams[index], teams[other]) for index, other in round_pairs]
+            if self.share_components:
+                round_teams = [
+                    (team, other_team)
+                    for team, other_team in round_teams
+                    if not team.component_ids & other_team.component_ids
+                ]
+            rounds.append(round_teams)
+        return rounds
+
+    def get_teams_ranking(self):
+        """Teams of this tournament, from the best in the current standings."""
+        self.ensure_one()
+        return self.team_ids.sorted(
+            key=lambda t: (-t.tournament_points, -t.sets_ratio, -t.points_ratio, t.id)
+        )
+
+    def get_swiss_round(self):
+        """
+        Next round of this Swiss-system tournament,
+        paired from the current standings of the teams.
+
+        A round that is not played yet can be paired again
+        if its matches are reset before generation,
+        a round that is partially played must be completed first.
+
+        :return: a (round number, list of pairs of teams) tuple.
+        """
+        self.ensure_one()
+        matches = self.match_ids
+        done_matches = matches.filtered(lambda m: m.state == "done")
+        pending_matches = matches - done_matches
+        last_round_number = max(done_matches.mapped("round_number"), default=0)
+        if pending_matches and (
+            not self.reset_matches_before_generation
+            or any(
+                round_number <= last_round_number
+                for round_number in pending_matches.mapped("round_number")
+            )
+        ):
+            raise UserError(
+                _(
+                    "Tournament {tourn_name}:\n"
+                    "All the matches must be done before pairing the next round."
+                ).format(tourn_name=self.display_name)
+            )
+        teams = self.team_ids
+        ranking = self.get_teams_ranking()
+        played = set()
+        teams_matches_count = Counter()
+        for match_values in done_matches.read(["team_ids"], load=None):
+            played.add(frozenset(match_values["team_ids"]))
+            teams_matches_count.update(match_values["team_ids"])
+        round_number = last_round_number + 1
+        teams_byes = {
+            team_id: round_number - 1 - teams_matches_count[team_id]
+            for team_id in teams.ids
+        }
+        pairs, _bye = scheduling.swiss_pairs(ranking.ids, played, byes=teams_byes)
+        if pairs is None:
+            raise UserError(
+                _(
+                    "Tournament {tourn_name}:\n"
+                    "Round {round_number} can't be paired without rematches."
+                ).format(tourn_name=self.display_name, round_number=round_number)
+            )
+        return round_number, [
+            (teams.browse(team_id), teams.browse(other_team_id))
+            for team_id, other_team_id in pairs
+        ]
+
+    def get_knockout_seeds(self):
+        """
+        Teams of this elimination tournament, sorted by seed.
+
+        Teams without a seed are seeded after the others,
+        following the current standings.
+        """
+        self.ensure_one()
+        teams = self.team_ids
+        unseeded_teams = teams.filtered(lambda t: not t.seed)
+        seeded_teams = (teams - unseeded_teams).sorted(lambda t: (t.seed, t.id))
+        if not unseeded_teams:
+            return seeded_teams
+        ranking = self.get_teams_ranking()
+        return (
+            seeded_teams
+            | ranking.filtered(lambda t: t in unseeded_teams)
+            | unseeded_teams
+        )
+
+    def save_knockout_seeds(self):
+        """Store the seeds of the teams of the elimination tournaments in `self`."""
+        for tournament in self:
+            if tournament.tournament_format not in ("knockout", "double_elimination"):
+                continue
+            for seed, team in enumerate(tournament.get_knockout_seeds(), start=1):
+                if team.seed != seed:
+                    team.seed = seed
+
+    def get_knockout_bracket(self):
+        """Bracket of this elimination tournament, with the results of done matches."""
+        self.ensure_one()
+        seeds = self.get_knockout_seeds()
+
+        results = {}
+        done_matches = self.match_ids.filtered(
+            lambda m: m.state == "done" and m.bracket
+        )
+        for match in done_matches:
+            winner = match.winner_team_id
+            loser = match.team_ids - winner
+            slot = (match.bracket, match.round_number, match.bracket_position)
+            results[slot] = (winner.id, loser.id)
+        return scheduling.Bracket(
+            seeds.ids,
+            double=self.tournament_format == "double_elimination",
+            results=results,
+        )
+
+    def get_knockout_matches(self, ignore_pending=False):
+        """
+        Matches of this elimination tournament whose teams are known
+        and that have not been created yet.
+
+        :param ignore_pending: consider matches that are not done as missing.
+        :return: a dictionary mapping each bracket slot to its pair of teams.
+        """
+        self.ensure_one()
+        teams = self.team_ids
+        bracket = self.get_knockout_bracket()
+        existing_slots = set()
+        if not ignore_pending:
+            for match in self.match_ids.filtered("bracket"):
+                existing_slots.add(
+                    (match.bracket, match.round_number, match.bracket_position)
+                )
+        return {
+            slot: (teams.browse(team_id), teams.browse(other_team_id))
+            for slot, (team_id, other_team_id) in bracket.playable().items()
+            if slot not in existing_slots
+        }
+
+    def generate_knockout_matches(self):
+        """Create the matches of the bracket whose teams have just been decided."""
+        self.save_knockout_seeds()
+        knockout_matches = self.get_knockout_matches()
+        if not knockout_matches:
+            return self.env["event.tournament.match"].browse()
+        # New matches can't start before the matches deciding their teams end
+        teams_ids = {
+            team.id for match_teams in knockout_matches.values() for team in match_teams
+        }
+        played_matches = self.match_ids.filtered(
+            lambda m: m.state == "done" and set(m.team_ids.ids) & teams_ids
+        )
+        min_start = max(
+            [end for end in played_matches.mapped("time_scheduled_end") if end]
+            or [fields.Datetime.now()]
+        )
+        return self.with_context(scheduling_min_start=min_start).schedule_matches(
+            list(knockout_matches.values())
+        )
+
+    def get_matches_round_values(self):
+        """
+        Round of each match of this tournament and its sub tournaments.
+
+        :return: a dictionary mapping the frozenset of the teams IDs of a match
+            to the values of its round: number, starting from 1,
+            and bracket slot for elimination tournaments.
+            Matches of tournaments not played in rounds are missing.
+        """
+        rounds_values = {}
+        all_tournaments = self | self.get_children()
+        for tournament in all_tournaments:
+            tournament_format = tournament.tournament_format
+            if tournament_format in ("knockout", "double_elimination"):
+                knockout_matches = tournament.get_knockout_matches(
+                    ignore_pending=tournament.reset_matches_before_generation
+                )
+                for slot, match_teams in knockout_matches.items():
+                    bracket, round_number, position = slot
+                    teams_ids = frozenset(team.id for team in match_teams)
+                    rounds_values[teams_ids] = {
+                        "round_number": round_number,
+                        "bracket": bracket,
+                        "bracket_position": position,
+                    }
+                continue
+            if tournament_format == "round_robin":
+                rounds = enumerate(tournament.get_round_robin_rounds(), start=1)
+            elif tournament_format == "swiss":
+                rounds = [tournament.get_swiss_round()]
+            else:
+                continue
+            for round_number, round_teams in rounds:
+                for match_teams in round_teams:
+                    teams_ids = frozenset(team.id for team in match_teams)
+                    rounds_values[teams_ids] = {"round_number": round_number}
+        return rounds_values
+
     def get_match_tuples_single(self):
         self.ensure_one()
         teams = self.team_ids
         match_teams_nbr = self.match_teams_nbr
-        matches_teams = itertools.combinations(teams, match_teams_nbr)
-        if self.share_components:
-            matches_teams = (
-                match_teams
-                for match_teams in matches_teams
-                if not reduce(
-                    lambda team_1, team_2: team_1.component_ids & team_2.component_ids,
-                    match_teams,
-                )
+        if self.tournament_format == "round_robin":
+            return itertools.chain.from_iterable(self.get_round_robin_rounds())
+        if self.tournament_format == "swiss":
+            return self.get_swiss_round()[1]
+        if self.tournament_format in ("knockout", "double_elimination"):
+            knockout_matches = self.get_knockout_matches(
+                ignore_pending=self.reset_matches_before_generation
             )
+            return list(knockout_matches.values())
+        if not self.share_components:
+            return itertools.combinations(teams, match_teams_nbr)
 
-        return matches_teams
+        teams_components = [team.component_ids.ids for team in teams]
+        return (
+            tuple(teams[index] for index in teams_indexes)
+            for teams_indexes in scheduling.compatible_tuples(
+                teams_components, match_teams_nbr
+            )
+        )
 
-    def get_match_tuples(self):
+    def iter_match_tuples(self):
+        """
+        Lazily generate the teams of each match
+        of this tournament and its sub tournaments.
+
+        Matches of different tournaments are interleaved.
+        """
         all_tournaments = self | self.get_children()
         all_tournaments_matches = dict.fromkeys(all_tournaments)
         for tournament in all_tournaments:
@@ -344,15 +1434,32 @@ class EventTournament(models.Model):
                         "for matches generation."
                     ).format(tourn_name=tournament.display_name)
                 )
+            if (
+                tournament.tournament_format
+                in ("round_robin", "swiss", "knockout", "double_elimination")
+                and tournament.match_teams_nbr != 2
+            ):
+                raise UserError(
+                    _(
+                        "Tournament {tourn_name}:\n"
+                        "Matches played in rounds require 2 teams per match."
+                    ).format(tourn_name=tournament.display_name)
+                )
             all_tournaments_matches[tournament] = tournament.get_match_tuples_single()
 
         matches_by_index = itertools.zip_longest(*all_tournaments_matches.values())
         flat_matches = itertools.chain.from_iterable(matches_by_index)
-        matches_teams = list(filter(None, flat_matches))
+        return filter(None, flat_matches)
 
-        return matches_teams
+    def get_match_tuples(self):
+        return list(self.iter_match_tuples())
 
     def get_max_min_start(self, match_duration):
+        """
+        Bounds of the start of the matches of this tournament.
+
+        The ``scheduling_min_start`` context key delays the earliest start.
+        """
         if not self.start_datetime:
             raise UserError(
                 _(
@@ -361,6 +1468,9 @@ class EventTournament(models.Model):
                 ).format(tourn_name=self.display_name)
             )
         min_start = self.start_datetime
+        context_min_start = self.env.context.get("scheduling_min_start")
+        if context_min_start:
+            min_start = max(min_start, context_min_start)
 
         if not self.end_datetime:
             raise UserError(
@@ -373,32 +1483,47 @@ class EventTournament(models.Model):
         return max_start, min_start
 
     def get_match_duration(self):
-        if self.match_duration <= 0:
+        duration = self.get_scheduling_value("match_duration")
+        if duration <= 0:
             raise UserError(
                 _("Tournament {tourn_name}:\nA match should have a duration.").format(
                     tourn_name=self.display_name
                 )
             )
-        match_duration = timedelta(hours=self.match_warm_up_duration) + timedelta(
-            hours=self.match_duration
-        )
+        match_duration = timedelta(
+            hours=self.get_scheduling_value("match_warm_up_duration")
+        ) + timedelta(hours=duration)
         return match_duration
 
     def reset_matches(self, matches_teams):
-        clean_matches_teams = []
+        """
+        Delete the matches that are not done.
+
+        :return: `matches_teams` without the teams of done matches,
+            filtered lazily.
+        """
+        matches, matches_teams = self.skip_done_matches(matches_teams)
+        matches.unlink()
+        return matches_teams
+
+    def skip_done_matches(self, matches_teams):
+        """
+        Matches that are not done and `matches_teams`
+        without the teams of done matches, filtered lazily.
+        """
         matches = self.get_children().mapped("match_ids")
         done_matches = matches.filtered(lambda m: m.state == "done")
-        for match_teams in matches_teams:
-            for done_match in done_matches:
-                if done_match.team_ids.ids == [mt.id for mt in match_teams]:
-                    # Corresponding match_team found
-                    break
-            else:
-                # Corresponding match_team not found
-                clean_matches_teams.append(match_teams)
-        matches_teams = clean_matches_teams
-        (matches - done_matches).unlink()
-        return matches_teams
+        # Brackets can have rematches and already skip their played slots
+        done_matches_teams = {
+            frozenset(done_match.team_ids.ids)
+            for done_match in done_matches
+            if not done_match.bracket
+        }
+        return matches - done_matches, (
+            match_teams
+            for match_teams in matches_teams
+            if frozenset(team.id for team in match_teams) not in done_matches_teams
+        )
 
     def recompute_matches_points(self):
         self.get_children().mapped("team_ids").compute_matches_points()
@@ -407,6 +1532,171 @@ class EventTournament(models.Model):
         self.generate_matches()
         return self.action_view_matches()
 
+    def get_playoff_qualified_teams(self):
+        """
+        Best teams of each sub tournament, ranked with a single query.
+
+        :return: the qualified teams, sorted by their position in their pool
+            and then by their standings.
+        """
+        self.ensure_one()
+        pools = self.child_ids
+        team_model = self.env["event.tournament.team"]
+        team_model.flush_model(
+            ["tournament_id", "tournament_points", "sets_ratio", "points_ratio"]
+        )
+        self.env.cr.execute(
+            """
+            SELECT id
+            FROM (
+                SELECT
+                    id,
+                    tournament_points,
+                    sets_ratio,
+                    points_ratio,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY tournament_id
+                        ORDER BY
+                            tournament_points DESC,
+                            sets_ratio DESC,
+                            points_ratio DESC,
+                            id
+                    ) AS pool_rank
+                FROM event_tournament_team
+                WHERE tournament_id IN %s
+            ) ranking
+            WHERE pool_rank <= %s
+            ORDER BY
+                pool_rank,
+                tournament_points DESC,
+                sets_ratio DESC,
+                points_ratio DESC,
+                id
+            """,
+            (tuple(pools.ids), self.qualified_per_pool),
+        )
+        return team_model.browse([row[0] for row in self.env.cr.fetchall()])
+
+    def get_playoff_values(self, qualified_teams):
+        """Values of the playoff between `qualified_teams`."""
+        self.ensure_one()
+        pools = self.child_ids
+        courts = self.court_ids or pools.mapped("court_ids")
+        # Play the playoff after the pools, in the remaining time
+        last_pool_match = self.env["event.tournament.match"].search(
+            [
+                ("tournament_id", "in", pools.ids),
+                ("time_scheduled_end", "!=", False),
+            ],
+            order="time_scheduled_end desc",
+            limit=1,
+        )
+        start = self.start_datetime or min(
+            pools.filtered("start_datetime").mapped("start_datetime"),
+            default=False,
+        )
+        if last_pool_match and (
+            not start or start < last_pool_match.time_scheduled_end
+        ):
+            start = last_pool_match.time_scheduled_end
+        end = self.end_datetime or max(
+            pools.filtered("end_datetime").mapped("end_datetime"),
+            default=False,
+        )
+
+        teams_names = Counter(qualified_teams.mapped("name"))
+        teams_values = []
+        for seed, team in enumerate(qualified_teams, start=1):
+            name = team.name
+            if teams_names[name] > 1:
+                name = _("{team_name} ({tourn_name})").format(
+                    team_name=name,
+                    tourn_name=team.tournament_id.display_name,
+                )
+            teams_values.append(
+                Command.create(
+                    {
+                        "name": name,
+                        "seed": seed,
+                        "component_ids": [Command.set(team.component_ids.ids)],
+                    }
+                )
+            )
+        return {
+            "name": _("{tourn_name} playoff").format(tourn_name=self.display_name),
+            "event_id": self.event_id.id,
+            "court_ids": [Command.set(courts.ids)],
+            "start_datetime": start,
+            "end_datetime": end,
+            "tournament_format": self.playoff_format,
+            "match_teams_nbr": 2,
+            "match_mode_id": self.match_mode_id.id,
+            "match_duration": self.match_duration,
+            "match_warm_up_duration": self.match_warm_up_duration,
+            "min_rest_duration": self.min_rest_duration,
+            "points_per_win": self.points_per_win,
+            "scheduling_mode": self.scheduling_mode,
+            "share_components": any(pools.mapped("share_components")),
+            "min_components": min(pools.mapped("min_components")),
+            "max_components": max(pools.mapped("max_components")),
+            "min_components_female": 0,
+            "min_components_male": 0,
+            "team_ids": teams_values,
+        }
+
+    def generate_playoff(self):
+        """
+        Create the playoff between the best teams of the sub tournaments
+        and generate its first matches.
+
+        A previous playoff is replaced if none of its matches is done.
+        """
+        self.ensure_one()
+        pools = self.child_ids
+        if not pools:
+            raise UserError(
+                _(
+                    "Tournament {tourn_name}:\n"
+                    "Sub tournaments are required for the playoff."
+                ).format(tourn_name=self.display_name)
+            )
+        pending_matches = pools.mapped("match_ids").filtered(
+            lambda m: m.state != "done"
+        )
+        if pending_matches:
+            raise UserError(
+                _(
+                    "Tournament {tourn_name}:\n"
+                    "All the matches of the sub tournaments must be done "
+                    "before generating the playoff."
+                ).format(tourn_name=self.display_name)
+            )
+
+        playoff = self.playoff_tournament_id
+        if playoff:
+            if playoff.match_ids.filtered(lambda m: m.state == "done"):
+                raise UserError(
+                    _(
+                        "Tournament {tourn_name}:\n"
+                        "Playoff {playoff_name} has already started."
+                    ).format(
+                        tourn_name=self.display_name,
+                        playoff_name=playoff.display_name,
+                    )
+                )
+            playoff.match_ids.unlink()
+            playoff.unlink()
+
+        qualified_teams = self.get_playoff_qualified_teams()
+        playoff = self.create(self.get_playoff_values(qualified_teams))
+        self.playoff_tournament_id = playoff
+        playoff.generate_matches()
+        return playoff
+
+    def generate_view_playoff(self):
+        playoff = self.generate_playoff()
+        return playoff.action_view_matches()
+
     def set_tournament_domain(self, action):
         """
         Set current tournament domain in `action`.
@@ -453,11 +1743,17 @@ class EventTournament(models.Model):
             "target": "current",
         }
 
+    def get_random(self):
+        """Random generator following the seed of the tournament."""
+        self.ensure_one()
+        return random.Random(self.random_seed)
+
     def generate_teams(self):
         """
         Generate random teams from the event's participants.
         """
         self.ensure_one()
+        rng = self.get_random()
         if not self.min_components:
             raise UserError(
                 _(
@@ -473,7 +1769,7 @@ class EventTournament(models.Model):
             female_components_ids = components.filtered(
                 lambda c: c.gender == "female"
             ).ids
-            random.shuffle(female_components_ids)
+            rng.shuffle(female_components_ids)
             female_components_tuples = grouper(
                 female_components_ids,
                 self.min_components_female,
@@ -483,7 +1779,7 @@ class EventTournament(models.Model):
             male_components_ids = [
                 c_id for c_id in components_ids if c_id not in female_components_ids
             ]
-            random.shuffle(male_components_ids)
+            rng.shuffle(male_components_ids)
             male_components_tuples = grouper(
                 male_components_ids,
                 self.min_components_male,
@@ -498,7 +1794,7 @@ class EventTournament(models.Model):
             # Flatten [((f), (m, m), ...)]
             components_tuples = [f + m for f, m in f_m_components_tuples]
         else:
-            random.shuffle(components_ids)
+            rng.shuffle(components_ids)
             if not self.share_components:
                 components_tuples = grouper(
                     components_ids, self.min_components, fillvalue=components_fill_value
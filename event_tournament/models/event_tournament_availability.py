@@ -0,0 +1,97 @@
+#  Copyright 2023 Simone Rubino <daemo00@gmail.com>
+#  License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import api, fields, models
+from odoo.tools import sql
+
+
+class EventTournamentAvailability(models.Model):
+    _name = "event.tournament.availability"
+    _description = "Availability window of a court or a component"
+    _order = "time_start"
+
+    court_id = fields.Many2one(
+        comodel_name="event.tournament.court",
+        ondelete="cascade",
+    )
+    component_id = fields.Many2one(
+        comodel_name="event.registration",
+        ondelete="cascade",
+    )
+    time_start = fields.Datetime(
+        string="From",
+        required=True,
+    )
+    time_end = fields.Datetime(
+        string="To",
+        required=True,
+    )
+
+    _sql_constraints = [
+        (
+            "time_check",
+            "CHECK (time_start < time_end)",
+            "An availability window must end after it starts.",
+        ),
+        (
+            "owner_check",
+            "CHECK ((court_id IS NULL) != (component_id IS NULL))",
+            "An availability window belongs to either a court or a component.",
+        ),
+    ]
+
+    def init(self):
+        super().init()
+        sql.create_index(
+            self.env.cr,
+            "event_tournament_availability_court_time_index",
+            self._table,
+            ["court_id", "time_start"],
+        )
+        sql.create_index(
+            self.env.cr,
+            "event_tournament_availability_component_time_index",
+            self._table,
+            ["component_id", "time_start"],
+        )
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        availabilities = super().create(vals_list)
+        availabilities.mapped("court_id").update_slots()
+        return availabilities
+
+    def write(self, vals):
+        courts = self.mapped("court_id")
+        res = super().write(vals)
+        (courts | self.mapped("court_id")).update_slots()
+        return res
+
+    def unlink(self):
+        courts = self.mapped("court_id")
+        res = super().unlink()
+        courts.update_slots()
+        return res
+
+    @api.model
+    def get_windows(self, owner_field, owners):
+        """
+        Availability windows of `owners`, in one query.
+
+        :param owner_field: name of the field linking the windows to `owners`.
+        :return: a dictionary mapping the IDs of the owners having windows
+            to their sorted list of (start, end) tuples.
+        """
+        windows = {}
+        if not owners:
+            return windows
+        for values in self.search_read(
+            [(owner_field, "in", owners.ids)],
+            [owner_field, "time_start", "time_end"],
+            order="time_start",
+            load=None,
+        ):
+            windows.setdefault(values[owner_field], []).append(
+                (values["time_start"], values["time_end"])
+            )
+        return windows
@@ -1,7 +1,14 @@
 #  Copyright 2020 ~ 2023 Simone Rubino <daemo00@gmail.com>
 #  License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
+from datetime import datetime
+
 from odoo import _, api, fields, models
+from odoo.exceptions import UserError
+
+from ..tools import scheduling
+
+AVAILABILITY_FIELDS = ["time_availability_start", "time_availability_end"]
 
 
 class EventCourt(models.Model):
@@ -13,6 +20,23 @@ class EventCourt(models.Model):
     name = fields.Char()
     time_availability_start = fields.Datetime(string="Availability start")
     time_availability_end = fields.Datetime(string="Availability end")
+    availability_ids = fields.One2many(
+        comodel_name="event.tournament.availability",
+        inverse_name="court_id",
+        string="Availability windows",
+        help="When the court can be used, "
+        "within its availability start and end. "
+        "If there are none, the court can be used "
+        "from its availability start to its availability end.",
+    )
+    slot_ids = fields.One2many(
+        comodel_name="event.tournament.court.slot",
+        inverse_name="court_id",
+        string="Slots",
+        readonly=True,
+        help="Availability of the court, split into the time used by each match "
+        "and the free time in between.",
+    )
 
     _sql_constraints = [
         (
@@ -22,6 +46,18 @@ class EventCourt(models.Model):
         )
     ]
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        courts = super().create(vals_list)
+        courts.update_slots()
+        return courts
+
+    def write(self, vals):
+        res = super().write(vals)
+        if any(field_name in vals for field_name in AVAILABILITY_FIELDS):
+            self.update_slots()
+        return res
+
     @api.returns("self", lambda value: value.id)
     def copy(self, default=None):
         self.ensure_one()
@@ -34,3 +70,276 @@ class EventCourt(models.Model):
         if self.event_id:
             self.time_availability_start = self.event_id.date_begin
             self.time_availability_end = self.event_id.date_end
+
+    def get_availability_windows(self):
+        """
+        (start, end) tuples of when the court can be used:
+        its availability windows, within its availability start and end.
+
+        A missing (None) bound is open.
+        """
+        self.ensure_one()
+        start = self.time_availability_start or None
+        end = self.time_availability_end or None
+        if not self.availability_ids:
+            return [(start, end)]
+        windows = []
+        for availability in self.availability_ids:
+            window_start = availability.time_start
+            if start and start > window_start:
+                window_start = start
+            window_end = availability.time_end
+            if end and end < window_end:
+                window_end = end
+            if window_start < window_end:
+                windows.append((window_start, window_end))
+        return windows
+
+    def update_slots(self, spans=None):
+        """
+        Rebuild the slots of the courts
+        from their availability and their scheduled matches.
+
+        :param spans: a dictionary mapping court IDs to the (start, end) tuples
+            of the matches that changed on the court:
+            only the slots around them are rebuilt
+            and the courts missing from `spans` are left untouched.
+            If missing, all the slots of the courts are rebuilt.
+        """
+        if not self:
+            return
+        self.flush_recordset(AVAILABILITY_FIELDS)
+        self.env["event.tournament.match"].flush_model(
+            ["court_id", "time_scheduled_start", "time_scheduled_end"]
+        )
+        slot_model = self.env["event.tournament.court.slot"]
+        slot_model.flush_model()
+        for court in self:
+            if spans is None:
+                court.rebuild_slots(datetime.min, datetime.max)
+            elif spans.get(court.id):
+                court.rebuild_slots(*court.get_slots_range(spans[court.id]))
+        slot_model.invalidate_model(flush=False)
+        self.invalidate_recordset(["slot_ids"], flush=False)
+
+    def get_slots_range(self, spans):
+        """
+        Smallest range covering `spans` and the slots overlapping or touching them,
+        so that the free slots around `spans` are merged when rebuilt.
+
+        :return: a (start, end) tuple, open bounds are
+            :attr:`datetime.min` and :attr:`datetime.max`.
+        """
+        self.ensure_one()
+        spans_start = min(span[0] for span in spans)
+        spans_end = max(span[1] for span in spans)
+        self.env.cr.execute(
+            """
+            SELECT
+                min(time_start), max(time_end),
+                bool_or(time_start IS NULL), bool_or(time_end IS NULL)
+            FROM event_tournament_court_slot
+            WHERE court_id = %s
+                AND (time_start IS NULL OR time_start <= %s)
+                AND (time_end IS NULL OR time_end >= %s)
+            """,
+            (self.id, spans_end, spans_start),
+        )
+        slots_start, slots_end, is_start_open, is_end_open = self.env.cr.fetchone()
+        range_start = min(spans_start, slots_start or spans_start)
+        range_end = max(spans_end, slots_end or spans_end)
+        return (
+            datetime.min if is_start_open else range_start,
+            datetime.max if is_end_open else range_end,
+        )
+
+    def rebuild_slots(self, range_start, range_end):
+        """
+        Replace the slots of the court between `range_start` and `range_end`,
+        that are bounds of existing slots or of the changed matches.
+        """
+        self.ensure_one()
+        # Open bounds of slots are stored as NULL
+        range_params = (
+            "-infinity" if range_start == datetime.min else range_start,
+            "infinity" if range_end == datetime.max else range_end,
+        )
+        self.env.cr.execute(
+            """
+            DELETE FROM event_tournament_court_slot
+            WHERE court_id = %s
+                AND COALESCE(time_start, '-infinity') >= %s::timestamp
+                AND COALESCE(time_end, 'infinity') <= %s::timestamp
+            """,
+            (self.id, *range_params),
+        )
+        self.env.cr.execute(
+            """
+            SELECT id, time_scheduled_start, time_scheduled_end
+            FROM event_tournament_match
+            WHERE court_id = %s
+                AND time_scheduled_start IS NOT NULL
+                AND time_scheduled_end IS NOT NULL
+                AND time_scheduled_start < %s::timestamp
+                AND time_scheduled_end > %s::timestamp
+            ORDER BY time_scheduled_start
+            """,
+            (self.id, range_params[1], range_params[0]),
+        )
+        matches_values = self.env.cr.fetchall()
+
+        windows = []
+        for window_start, window_end in self.get_availability_windows():
+            window_start = max(window_start or datetime.min, range_start)
+            window_end = min(window_end or datetime.max, range_end)
+            if window_start < window_end:
+                windows.append((window_start, window_end))
+        free_intervals = scheduling.FreeIntervals(windows)
+        slots = []
+        for match_id, start, end in matches_values:
+            free_intervals.reserve(start, end)
+            # Slots of matches crossing the range have been kept
+            if range_start <= start and end <= range_end:
+                slots.append((self.id, match_id, start, end))
+        for index, start in enumerate(free_intervals.starts):
+            end = free_intervals.ends[index]
+            slots.append(
+                (
+                    self.id,
+                    None,
+                    None if start == datetime.min else start,
+                    None if end == datetime.max else end,
+                )
+            )
+        if slots:
+            self.env.cr.execute(
+                """
+                INSERT INTO event_tournament_court_slot
+                    (court_id, match_id, time_start, time_end)
+                SELECT * FROM unnest(
+                    %s::integer[], %s::integer[], %s::timestamp[], %s::timestamp[]
+                )
+                """,
+                (
+                    [slot[0] for slot in slots],
+                    [slot[1] for slot in slots],
+                    [slot[2] for slot in slots],
+                    [slot[3] for slot in slots],
+                ),
+            )
+
+    def get_scheduling_specs(self):
+        """Plain data describing when the courts can be used."""
+        return [
+            scheduling.CourtSpec(
+                id=court.id,
+                available_start=court.time_availability_start,
+                available_end=court.time_availability_end,
+                windows=tuple(court.get_availability_windows()),
+            )
+            for court in self
+        ]
+
+    def shift_matches(self, delay, time_start):
+        """
+        Delay by `delay` all the matches of the court
+        that are not done and start from `time_start`.
+
+        The shifted matches are validated together
+        against the other matches of their components
+        and moved with a single query.
+
+        :return: the shifted matches.
+        """
+        self.ensure_one()
+        match_model = self.env["event.tournament.match"]
+        matches = match_model.search(
+            [
+                ("court_id", "=", self.id),
+                ("state", "!=", "done"),
+                ("time_scheduled_start", ">=", time_start),
+                ("time_scheduled_end", "!=", False),
+            ]
+        )
+        match_model.write_schedule(
+            [
+                (
+                    match,
+                    self.id,
+                    match.time_scheduled_start + delay,
+                    match.time_scheduled_end + delay,
+                )
+                for match in matches
+            ]
+        )
+        return matches
+
+    def reschedule_matches(self, time_start, time_end=None):
+        """
+        Make the court unavailable from `time_start` to `time_end`,
+        or indefinitely if `time_end` is missing,
+        and move only the matches affected by it.
+
+        The matches in the way are moved to their earliest free slot,
+        pushing later the following matches only if needed.
+        Matches that are done or started before `time_start` are not moved.
+
+        :return: the moved matches.
+        """
+        self.ensure_one()
+        match_model = self.env["event.tournament.match"]
+        movable_domain = [
+            ("state", "!=", "done"),
+            ("court_id", "!=", False),
+            ("time_scheduled_start", ">=", time_start),
+            ("time_scheduled_end", "!=", False),
+        ]
+        tournaments = match_model.search(
+            [("court_id", "=", self.id)] + movable_domain
+        ).mapped("tournament_id")
+        if not tournaments:
+            return match_model.browse()
+        matches = match_model.search(
+            [("tournament_id", "in", tournaments.ids)] + movable_domain
+        )
+        scheduler = tournaments.get_scheduler(
+            tournaments.mapped("court_ids") | self,
+            tournaments.mapped("team_ids.component_ids"),
+            exclude_matches=matches,
+        )
+        placements = tournaments.add_placements(scheduler, matches)
+        slots = {
+            match_id: (placement.court_id, placement.start)
+            for match_id, placement in placements.items()
+        }
+        scheduler.add_busy(self.id, (), time_start, time_end, key="unavailable")
+        displaced = [
+            placement
+            for placement in placements.values()
+            if placement.court_id == self.id
+            and scheduling.overlaps(
+                placement.start, placement.end, time_start, time_end
+            )
+        ]
+        for placement in displaced:
+            scheduler.remove_placement(placement)
+        if scheduler.reschedule(displaced) is None:
+            raise UserError(
+                _(
+                    "Court {court_name}:\n"
+                    "the matches can't be moved before the end of their tournaments."
+                ).format(court_name=self.name)
+            )
+
+        schedules = [
+            (
+                match_model.browse(match_id),
+                placement.court_id,
+                placement.start,
+                placement.end,
+            )
+            for match_id, placement in placements.items()
+            if (placement.court_id, placement.start) != slots[match_id]
+        ]
+        match_model.write_schedule(schedules)
+        return match_model.browse([schedule[0].id for schedule in schedules])
@@ -0,0 +1,87 @@
+#  Copyright 2023 Simone Rubino <daemo00@gmail.com>
+#  License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import _, api, fields, models
+from odoo.tools import sql
+
+
+class EventTournamentCourtSlot(models.Model):
+    _name = "event.tournament.court.slot"
+    _description = "Time slot of a court"
+    _order = "court_id, time_start"
+    _log_access = False
+
+    court_id = fields.Many2one(
+        comodel_name="event.tournament.court",
+        required=True,
+        ondelete="cascade",
+    )
+    match_id = fields.Many2one(
+        comodel_name="event.tournament.match",
+        ondelete="cascade",
+        help="Match using the court in this slot, the slot is free if empty.",
+    )
+    time_start = fields.Datetime()
+    time_end = fields.Datetime()
+    name = fields.Char(
+        compute="_compute_name",
+    )
+
+    def init(self):
+        super().init()
+        sql.create_index(
+            self.env.cr,
+            "event_tournament_court_slot_court_time_index",
+            self._table,
+            ["court_id", "time_start"],
+        )
+        sql.create_index(
+            self.env.cr,
+            "event_tournament_court_slot_free_index",
+            self._table,
+            ["court_id", "time_end"],
+            where="match_id IS NULL",
+        )
+        # Courts created before the slots existed
+        self.env["event.tournament.court"].search(
+            [("slot_ids", "=", False)]
+        ).update_slots()
+
+    @api.depends("match_id")
+    def _compute_name(self):
+        for slot in self:
+            slot.name = slot.match_id.display_name or _("Free")
+
+    @api.model
+    def get_next_free_start(self, courts, duration, start):
+        """
+        Earliest time, not before `start`,
+        when a `duration` long match can be played in any of `courts`.
+
+        :return: the start or None if no court is free long enough.
+        """
+        if not courts:
+            return None
+        self.flush_model()
+        # A slot with an open bound extends indefinitely
+        self.env.cr.execute(
+            """
+            SELECT MIN(GREATEST(time_start, %(start)s))
+            FROM event_tournament_court_slot
+            WHERE court_id IN %(courts_ids)s
+                AND match_id IS NULL
+                AND (
+                    time_end IS NULL
+                    OR (
+                        time_end >= %(start)s::timestamp + %(duration)s
+                        AND time_end - GREATEST(time_start, %(start)s) >= %(duration)s
+                    )
+                )
+            """,
+            {
+                "courts_ids": tuple(courts.ids),
+                "start": start,
+                "duration": duration,
+            },
+        )
+        return self.env.cr.fetchone()[0]
@@ -1,10 +1,33 @@
 #  Copyright 2020 ~ 2023 Simone Rubino <daemo00@gmail.com>
 #  License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+from collections import defaultdict
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import errors
 
 from odoo import _, api, fields, models
 from odoo.exceptions import UserError, ValidationError
 from odoo.fields import Command, first
 from odoo.osv import expression
+from odoo.tools import sql
+
+from ..tools import scheduling
+
+COURT_EXCLUSION_PARAMETER = "event_tournament.court_exclusion_constraint"
+COURT_EXCLUSION_CONSTRAINT = "event_tournament_match_court_time_excl"
+COURT_EXCLUSION_DEFINITION = (
+    "EXCLUDE USING gist ("
+    "court_id WITH =, "
+    "tsrange(time_scheduled_start, time_scheduled_end) WITH &&"
+    ") WHERE ("
+    "time_scheduled_start IS NOT NULL AND time_scheduled_end IS NOT NULL"
+    ") "
+    # Checked at the end of each statement,
+    # so that many matches can be moved in a single query
+    "DEFERRABLE INITIALLY IMMEDIATE"
+)
+COURT_TIME_FIELDS = ["court_id", "time_scheduled_start", "time_scheduled_end"]
 
 
 class EventTournamentMatch(models.Model):
@@ -60,6 +83,14 @@ class EventTournamentMatch(models.Model):
         store=True,
         states={"done": [("readonly", True)]},
     )
+    component_slot_ids = fields.One2many(
+        comodel_name="event.tournament.match.slot",
+        inverse_name="match_id",
+        compute="_compute_component_slot_ids",
+        store=True,
+        string="Components slots",
+        help="When each component is playing this match.",
+    )
     winner_team_id = fields.Many2one(
         comodel_name="event.tournament.team",
         string="Winner",
@@ -77,6 +108,24 @@ class EventTournamentMatch(models.Model):
     time_scheduled_end = fields.Datetime(
         string="Scheduled end", states={"done": [("readonly", True)]}
     )
+    round_number = fields.Integer(
+        string="Round",
+        states={"done": [("readonly", True)]},
+        help="Round of the tournament this match belongs to.",
+    )
+    bracket = fields.Selection(
+        selection=[
+            ("winners", "Winners"),
+            ("losers", "Losers"),
+            ("final", "Final"),
+        ],
+        states={"done": [("readonly", True)]},
+        help="Bracket of the elimination tournament this match belongs to.",
+    )
+    bracket_position = fields.Integer(
+        states={"done": [("readonly", True)]},
+        help="Position of this match in its bracket round, starting from 0.",
+    )
     time_done = fields.Datetime(
         states={
             "done": [
@@ -94,6 +143,20 @@ class EventTournamentMatch(models.Model):
         for match in self:
             match.component_ids = match.team_ids.mapped("component_ids")
 
+    @api.depends("component_ids", "time_scheduled_start", "time_scheduled_end")
+    def _compute_component_slot_ids(self):
+        for match in self:
+            match.component_slot_ids = [Command.clear()] + [
+                Command.create(
+                    {
+                        "component_id": component.id,
+                        "time_start": match.time_scheduled_start,
+                        "time_end": match.time_scheduled_end,
+                    }
+                )
+                for component in match.component_ids
+            ]
+
     @api.constrains("time_scheduled_start", "time_scheduled_end")
     def constrain_tournament_time(self):
         for match in self:
@@ -134,53 +197,120 @@ class EventTournamentMatch(models.Model):
 
     @api.constrains("time_scheduled_start", "time_scheduled_end", "component_ids")
     def constrain_contemporary(self):
-        for match in self:
-            contemporary_matches_domain = match.contemporary_match_domain()
-            contemporary_matches = self.search(contemporary_matches_domain)
-            contemporary_matches = contemporary_matches - match
-            match_components = match.component_ids
-            for cont_match in contemporary_matches:
-                cont_match_components = cont_match.component_ids
-                for cont_match_component in cont_match_components:
-                    if cont_match_component in match_components:
-                        raise ValidationError(
-                            _(
-                                "Match {match_name} not valid:\n"
-                                "Component {comp_name} is already playing "
-                                "in match {cont_match_name}."
-                            ).format(
-                                match_name=match.display_name,
-                                comp_name=cont_match_component.display_name,
-                                cont_match_name=cont_match.display_name,
-                            )
-                        )
+        conflicts = self.get_schedule_conflicts(check_courts=False)
+        if conflicts:
+            match, cont_match, cont_match_component = conflicts[0]
+            raise ValidationError(
+                _(
+                    "Match {match_name} not valid:\n"
+                    "Component {comp_name} is already playing "
+                    "in match {cont_match_name}."
+                ).format(
+                    match_name=match.display_name,
+                    comp_name=cont_match_component.display_name,
+                    cont_match_name=cont_match.display_name,
+                )
+            )
 
-    def contemporary_match_domain(self):
-        self.ensure_one()
-        domain = []
-        if self.time_scheduled_start:
+    def get_court_indexes(self):
+        """
+        Load once every match on the courts of `self`
+        that could overlap a match of `self`, and index them by court.
+
+        :return: a tuple of dictionaries
+            (intervals by court, unscheduled matches by court);
+            intervals are keyed by match ID.
+        """
+        domain = [("court_id", "in", self.court_id.ids)]
+        starts = [match.time_scheduled_start for match in self]
+        ends = [match.time_scheduled_end for match in self]
+        # A match without schedule overlaps any other match,
+        # an open bound extends indefinitely
+        is_unscheduled = any(
+            not starts[index] and not ends[index] for index in range(len(self))
+        )
+        if not is_unscheduled and all(ends):
             domain = expression.AND(
                 [
                     domain,
                     [
                         "|",
-                        ("time_scheduled_start", ">=", self.time_scheduled_start),
-                        ("time_scheduled_end", ">", self.time_scheduled_start),
+                        ("time_scheduled_start", "=", False),
+                        ("time_scheduled_start", "<", max(ends)),
                     ],
                 ]
             )
-        if self.time_scheduled_end:
+        if not is_unscheduled and all(starts):
             domain = expression.AND(
                 [
                     domain,
                     [
                         "|",
-                        ("time_scheduled_start", "<", self.time_scheduled_end),
-                        ("time_scheduled_end", "<=", self.time_scheduled_end),
+                        ("time_scheduled_end", "=", False),
+                        ("time_scheduled_end", ">", min(starts)),
                     ],
                 ]
             )
-        return domain
+        matches = self.search(domain) | self
+
+        court_intervals = defaultdict(scheduling.IntervalIndex)
+        court_unscheduled = defaultdict(list)
+        for match_values in matches.read(
+            ["court_id", "time_scheduled_start", "time_scheduled_end"],
+            load=None,
+        ):
+            start = match_values["time_scheduled_start"] or None
+            end = match_values["time_scheduled_end"] or None
+            match_id = match_values["id"]
+            court_id = match_values["court_id"]
+            if start is None and end is None:
+                court_unscheduled[court_id].append(match_id)
+            else:
+                court_intervals[court_id].add(start, end, match_id)
+        return court_intervals, court_unscheduled
+
+    def get_schedule_conflicts(self, check_courts=True, check_components=True):
+        """
+        Find, in one pass, every match overlapping a match in `self`
+        on the same court or with a common component.
+
+        A match without schedule overlaps any other match.
+
+        :return: a list of (match, overlapping match, component) tuples;
+            component is empty for overlaps on the same court.
+        """
+        conflicts = []
+        component_model = self.env["event.registration"]
+        if check_courts:
+            court_intervals, court_unscheduled = self.get_court_indexes()
+            for match in self:
+                start = match.time_scheduled_start or None
+                end = match.time_scheduled_end or None
+                court_id = match.court_id.id
+                matches_ids = [
+                    interval[2]
+                    for interval in court_intervals[court_id].overlapping(start, end)
+                ]
+                if start is None and end is None:
+                    matches_ids.extend(court_unscheduled[court_id])
+                conflicts.extend(
+                    (match, self.browse(match_id), component_model.browse())
+                    for match_id in matches_ids
+                    if match_id != match.id
+                )
+        if check_components:
+            slot_model = self.env["event.tournament.match.slot"]
+            conflicts.extend(
+                (
+                    self.browse(match_id),
+                    self.browse(overlapping_match_id),
+                    component_model.browse(component_id),
+                )
+                for match_id, overlapping_match_id, component_id in (
+                    slot_model.get_conflicts(self)
+                )
+            )
+        return conflicts
 
     @api.constrains("tournament_id", "court_id")
     def constrain_court(self):
@@ -200,26 +330,28 @@ class EventTournamentMatch(models.Model):
 
     @api.constrains("court_id", "time_scheduled_start", "time_scheduled_end")
     def constrain_court_time(self):
+        matches = self
+        if self.is_court_exclusion_enabled():
+            # Scheduled matches are checked by the database
+            matches = matches.filtered(
+                lambda m: not (m.time_scheduled_start and m.time_scheduled_end)
+            )
+        conflicts = matches.get_schedule_conflicts(check_components=False)
+        if conflicts:
+            match, overlapping_match, _component = conflicts[0]
+            raise ValidationError(
+                _(
+                    "Court {court_name} not valid:\n"
+                    "match {match_name} is overlapping "
+                    "{overlapping_match_name}."
+                ).format(
+                    court_name=match.court_id.display_name,
+                    match_name=match.display_name,
+                    overlapping_match_name=overlapping_match.display_name,
+                )
+            )
         for match in self:
             court = match.court_id
-            overlapping_matches_domain = match.contemporary_match_domain()
-            court_domain = [("court_id", "=", court.id)]
-            overlapping_matches_domain.extend(court_domain)
-            overlapping_matches = self.search(overlapping_matches_domain)
-            overlapping_matches = overlapping_matches - match
-            if overlapping_matches:
-                overlapping_match = first(overlapping_matches)
-                raise ValidationError(
-                    _(
-                        "Court {court_name} not valid:\n"
-                        "match {match_name} is overlapping "
-                        "{overlapping_match_name}."
-                    ).format(
-                        court_name=court.display_name,
-                        match_name=match.display_name,
-                        overlapping_match_name=overlapping_match.display_name,
-                    )
-                )
             if (
                 court.time_availability_start
                 and match.time_scheduled_start
@@ -256,6 +388,55 @@ class EventTournamentMatch(models.Model):
                         match_end=match.time_scheduled_end,
                     )
                 )
+            if (
+                court.availability_ids
+                and match.time_scheduled_start
+                and match.time_scheduled_end
+                and not court.get_scheduling_specs()[0].is_available(
+                    match.time_scheduled_start, match.time_scheduled_end
+                )
+            ):
+                raise ValidationError(
+                    _(
+                        "Match {match_name} not valid:\n"
+                        "court {court_name} is not available "
+                        "from {match_start} to {match_end}."
+                    ).format(
+                        match_name=match.display_name,
+                        court_name=court.display_name,
+                        match_start=match.time_scheduled_start,
+                        match_end=match.time_scheduled_end,
+                    )
+                )
+
+    @api.constrains("team_ids", "time_scheduled_start", "time_scheduled_end")
+    def constrain_components_availability(self):
+        matches = self.filtered(
+            lambda m: m.time_scheduled_start and m.time_scheduled_end
+        )
+        components_windows = self.env["event.tournament.availability"].get_windows(
+            "component_id", matches.mapped("component_ids")
+        )
+        for match in matches:
+            for component in match.component_ids:
+                windows = components_windows.get(component.id)
+                if windows and not any(
+                    start <= match.time_scheduled_start
+                    and match.time_scheduled_end <= end
+                    for start, end in windows
+                ):
+                    raise ValidationError(
+                        _(
+                            "Match {match_name} not valid:\n"
+                            "component {component_name} is not available "
+                            "from {match_start} to {match_end}."
+                        ).format(
+                            match_name=match.display_name,
+                            component_name=component.display_name,
+                            match_start=match.time_scheduled_start,
+                            match_end=match.time_scheduled_end,
+                        )
+                    )
 
     @api.constrains("state")
     def constrain_state(self):
@@ -353,8 +534,38 @@ class EventTournamentMatch(models.Model):
 
     def action_draft(self):
         self.ensure_one()
+        if self.bracket:
+            # The next matches were generated from the result of this match
+            next_matches = self.get_next_bracket_matches()
+            done_next_matches = next_matches.filtered(lambda m: m.state == "done")
+            if done_next_matches:
+                raise UserError(
+                    _(
+                        "Match {match_name} can't be reset to draft "
+                        "because match {next_match_name} is done."
+                    ).format(
+                        match_name=self.display_name,
+                        next_match_name=first(done_next_matches).display_name,
+                    )
+                )
+            next_matches.unlink()
         self.update({"time_done": False, "state": "draft"})
 
+    def get_next_bracket_matches(self):
+        """
+        Bracket matches of the teams of this match
+        that have been generated after it.
+        """
+        self.ensure_one()
+        return self.search(
+            [
+                ("tournament_id", "=", self.tournament_id.id),
+                ("bracket", "!=", False),
+                ("id", ">", self.id),
+                ("team_ids", "in", self.team_ids.ids),
+            ]
+        )
+
     def action_done(self):
         self.ensure_one()
         if self.state == "done":
@@ -377,6 +588,9 @@ class EventTournamentMatch(models.Model):
                     match_name=self.display_name
                 )
             )
+        if self.bracket:
+            # The winner and the loser might be able to play their next match
+            self.tournament_id.generate_knockout_matches()
         return True
 
     def name_get(self):
@@ -388,14 +602,250 @@ class EventTournamentMatch(models.Model):
             res.append((match.id, match_name))
         return res
 
+    @api.model
+    def is_court_exclusion_enabled(self):
+        """
+        Whether courts double-booking is prevented
+        by a database exclusion constraint instead of `constrain_court_time`.
+        """
+        get_param = self.env["ir.config_parameter"].sudo().get_param
+        return bool(get_param(COURT_EXCLUSION_PARAMETER))
+
+    def init(self):
+        super().init()
+        self.update_court_exclusion_constraint()
+
+    @api.model
+    def update_court_exclusion_constraint(self):
+        """Add or drop the courts exclusion constraint according to settings."""
+        cr = self.env.cr
+        existing_constraint = sql.constraint_definition(
+            cr, self._table, COURT_EXCLUSION_CONSTRAINT
+        )
+        if existing_constraint and existing_constraint != COURT_EXCLUSION_DEFINITION:
+            sql.drop_constraint(cr, self._table, COURT_EXCLUSION_CONSTRAINT)
+            existing_constraint = None
+        if self.is_court_exclusion_enabled():
+            if not existing_constraint:
+                try:
+                    with cr.savepoint(flush=False):
+                        # Needed for the equality on court_id in a GiST index
+                        cr.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+                except psycopg2.Error as error:
+                    raise UserError(
+                        _(
+                            "Extension btree_gist is needed "
+                            "to prevent courts double-booking in the database:\n"
+                            "{error}"
+                        ).format(error=error)
+                    ) from error
+                sql.add_constraint(
+                    cr,
+                    self._table,
+                    COURT_EXCLUSION_CONSTRAINT,
+                    COURT_EXCLUSION_DEFINITION,
+                )
+                if not sql.constraint_definition(
+                    cr, self._table, COURT_EXCLUSION_CONSTRAINT
+                ):
+                    raise UserError(
+                        _(
+                            "Courts double-booking can't be prevented "
+                            "in the database, "
+                            "check that no match is overlapping another match "
+                            "on the same court."
+                        )
+                    )
+        elif existing_constraint:
+            sql.drop_constraint(cr, self._table, COURT_EXCLUSION_CONSTRAINT)
+
+    @contextmanager
+    def court_exclusion_error(self, get_schedules):
+        """
+        Map violations of the courts exclusion constraint
+        to the error raised by `constrain_court_time`.
+
+        :param get_schedules: a function returning
+            the (match, court ID, start, end) tuples being written.
+        """
+        try:
+            with self.env.cr.savepoint(flush=False):
+                yield
+        except errors.ExclusionViolation as violation:
+            schedules = get_schedules()
+            self.invalidate_model(COURT_TIME_FIELDS, flush=False)
+            raise self.get_court_overlap_error(schedules) from violation
+
+    def get_court_overlap_error(self, schedules):
+        """Validation error for the first of `schedules` overlapping a match."""
+        court_intervals = defaultdict(scheduling.IntervalIndex)
+        existing_matches = self.search(
+            [
+                ("court_id", "in", [schedule[1] for schedule in schedules]),
+                (
+                    "id",
+                    "not in",
+                    [schedule[0]._origin.id for schedule in schedules],
+                ),
+                ("time_scheduled_start", "!=", False),
+                ("time_scheduled_end", "!=", False),
+            ]
+        )
+        for match in existing_matches:
+            court_intervals[match.court_id.id].add(
+                match.time_scheduled_start, match.time_scheduled_end, match
+            )
+        for match, court_id, start, end in schedules:
+            if not (start and end):
+                continue
+            overlapping_matches = court_intervals[court_id].overlapping(start, end)
+            if overlapping_matches:
+                return ValidationError(
+                    _(
+                        "Court {court_name} not valid:\n"
+                        "match {match_name} is overlapping "
+                        "{overlapping_match_name}."
+                    ).format(
+                        court_name=self.court_id.browse(court_id).display_name,
+                        match_name=match.display_name,
+                        overlapping_match_name=overlapping_matches[0][2].display_name,
+                    )
+                )
+            court_intervals[court_id].add(start, end, match)
+        return ValidationError(
+            _("A match is overlapping another match on the same court.")
+        )
+
     @api.model_create_multi
     def create(self, vals_list):
-        matches = super().create(vals_list)
+        if self.is_court_exclusion_enabled():
+
+            def get_schedules():
+                return [
+                    (
+                        self.new({"team_ids": vals.get("team_ids", [])}),
+                        vals.get("court_id"),
+                        fields.Datetime.to_datetime(vals.get("time_scheduled_start")),
+                        fields.Datetime.to_datetime(vals.get("time_scheduled_end")),
+                    )
+                    for vals in vals_list
+                ]
+
+            with self.court_exclusion_error(get_schedules):
+                matches = super().create(vals_list)
+        else:
+            matches = super().create(vals_list)
         stats_model = self.env["event.tournament.match.team_stats"]
         for match in matches:
             match.stats_ids = stats_model.create_from_matches(match)
+        matches.mapped("court_id").update_slots(matches.get_slots_spans())
         return matches
 
+    def get_slots_spans(self, spans=None):
+        """
+        Add the schedule of the matches to `spans`,
+        see :meth:`~.event_tournament_court.EventCourt.update_slots`.
+        """
+        if spans is None:
+            spans = defaultdict(list)
+        for match in self:
+            start = match.time_scheduled_start
+            end = match.time_scheduled_end
+            if match.court_id and start and end:
+                spans[match.court_id.id].append((start, end))
+        return spans
+
+    def write(self, vals):
+        is_schedule_changed = any(
+            field_name in vals for field_name in COURT_TIME_FIELDS
+        )
+        courts = self.mapped("court_id")
+        spans = self.get_slots_spans() if is_schedule_changed else None
+        if self.is_court_exclusion_enabled() and is_schedule_changed:
+
+            def get_schedules():
+                return [
+                    (
+                        match,
+                        match.court_id.id,
+                        match.time_scheduled_start,
+                        match.time_scheduled_end,
+                    )
+                    for match in self
+                ]
+
+            # Constraints checked during the write can flush it
+            with self.court_exclusion_error(get_schedules):
+                res = super().write(vals)
+                self.flush_recordset(COURT_TIME_FIELDS)
+        else:
+            res = super().write(vals)
+        if is_schedule_changed:
+            (courts | self.mapped("court_id")).update_slots(self.get_slots_spans(spans))
+        return res
+
+    def unlink(self):
+        courts = self.mapped("court_id")
+        spans = self.get_slots_spans()
+        res = super().unlink()
+        courts.update_slots(spans)
+        return res
+
+    @api.model
+    def write_schedule(self, schedules):
+        """
+        Move matches with a single query, then validate them as a batch.
+
+        :param schedules: (match, court ID, start, end) tuples.
+        """
+        if not schedules:
+            return
+        matches = self.browse([schedule[0].id for schedule in schedules])
+        done_matches = matches.filtered(lambda m: m.state == "done")
+        if done_matches:
+            raise UserError(
+                _("Match {match_name} is done and can't be moved.").format(
+                    match_name=first(done_matches).display_name
+                )
+            )
+        matches.check_access_rights("write")
+        matches.check_access_rule("write")
+        self.flush_model()
+        courts = matches.mapped("court_id") | self.env["event.tournament.court"].browse(
+            {schedule[1] for schedule in schedules if schedule[1]}
+        )
+        spans = matches.get_slots_spans()
+        with self.court_exclusion_error(lambda: schedules):
+            self.env.cr.execute(
+                """
+                UPDATE event_tournament_match AS match
+                SET
+                    court_id = schedule.court_id,
+                    time_scheduled_start = schedule.time_start,
+                    time_scheduled_end = schedule.time_end,
+                    write_uid = %s,
+                    write_date = (now() at time zone 'UTC')
+                FROM unnest(
+                    %s::integer[], %s::integer[], %s::timestamp[], %s::timestamp[]
+                ) AS schedule(id, court_id, time_start, time_end)
+                WHERE match.id = schedule.id
+                """,
+                (
+                    self.env.uid,
+                    [schedule[0].id for schedule in schedules],
+                    [schedule[1] for schedule in schedules],
+                    [schedule[2] for schedule in schedules],
+                    [schedule[3] for schedule in schedules],
+                ),
+            )
+        matches.invalidate_recordset(
+            COURT_TIME_FIELDS + ["write_uid", "write_date"], flush=False
+        )
+        # Components slots and any other field depending on the schedule
+        matches.modified(COURT_TIME_FIELDS)
+        matches._validate_fields(COURT_TIME_FIELDS)
+        courts.update_slots(matches.get_slots_spans(spans))
+
     @api.depends(
         "match_mode_id.tie_break_number",
     )
@@ -0,0 +1,79 @@
+#  Copyright 2023 Simone Rubino <daemo00@gmail.com>
+#  License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import api, fields, models
+from odoo.tools import sql
+
+
+class EventTournamentMatchSlot(models.Model):
+    _name = "event.tournament.match.slot"
+    _description = "Time slot of a component in a match"
+    _order = "time_start"
+    _log_access = False
+
+    match_id = fields.Many2one(
+        comodel_name="event.tournament.match",
+        required=True,
+        ondelete="cascade",
+        index=True,
+    )
+    component_id = fields.Many2one(
+        comodel_name="event.registration",
+        required=True,
+        ondelete="cascade",
+    )
+    time_start = fields.Datetime()
+    time_end = fields.Datetime()
+
+    def init(self):
+        super().init()
+        sql.create_index(
+            self.env.cr,
+            "event_tournament_match_slot_component_time_index",
+            self._table,
+            ["component_id", "time_start", "time_end"],
+        )
+
+    @api.model
+    def get_conflicts(self, matches):
+        """
+        Find, in one query, the components of `matches`
+        that are playing in other matches at the same time.
+
+        :return: a list of (match ID, overlapping match ID, component ID) tuples.
+        """
+        if not matches:
+            return []
+        matches.flush_recordset(["component_slot_ids"])
+        self.flush_model()
+        # A slot without schedule overlaps any other slot,
+        # a slot with an open bound extends indefinitely
+        self.env.cr.execute(
+            """
+            SELECT slot.match_id, other.match_id, slot.component_id
+            FROM event_tournament_match_slot slot
+            JOIN event_tournament_match_slot other
+                ON other.component_id = slot.component_id
+                AND other.match_id != slot.match_id
+            WHERE slot.match_id IN %s
+                AND (
+                    (slot.time_start IS NULL AND slot.time_end IS NULL)
+                    OR (
+                        NOT (other.time_start IS NULL AND other.time_end IS NULL)
+                        AND (
+                            slot.time_end IS NULL
+                            OR other.time_start IS NULL
+                            OR other.time_start < slot.time_end
+                        )
+                        AND (
+                            slot.time_start IS NULL
+                            OR other.time_end IS NULL
+                            OR other.time_end > slot.time_start
+                        )
+                    )
+                )
+            ORDER BY slot.match_id, other.time_start, other.match_id
+            """,
+            (tuple(matches.ids),),
+        )
+        return self.env.cr.fetchall()
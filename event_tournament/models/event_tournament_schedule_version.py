@@ -0,0 +1,200 @@
+#  Copyright 2023 Simone Rubino <daemo00@gmail.com>
+#  License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from collections import defaultdict
+
+from odoo import _, api, fields, models
+from odoo.fields import Command
+
+from ..tools import scheduling
+
+SNAPSHOT_FIELDS = [
+    "tournament_id",
+    "team_ids",
+    "court_id",
+    "time_scheduled_start",
+    "time_scheduled_end",
+    "round_number",
+    "bracket",
+    "bracket_position",
+]
+SNAPSHOT_DATETIME_FIELDS = ["time_scheduled_start", "time_scheduled_end"]
+SNAPSHOT_ROUND_FIELDS = ["round_number", "bracket", "bracket_position"]
+VERSIONS_LIMIT_PARAMETER = "event_tournament.schedule_versions_limit"
+VERSIONS_LIMIT_DEFAULT = 20
+
+
+def get_snapshot_key(entry):
+    """Tournament and teams of a match in a snapshot."""
+    return entry[0], tuple(entry[1])
+
+
+def get_snapshot_values(entry):
+    """Values of a match in a snapshot."""
+    return {
+        field_name: entry[index] for index, field_name in enumerate(SNAPSHOT_FIELDS)
+    }
+
+
+class EventTournamentScheduleVersion(models.Model):
+    _name = "event.tournament.schedule.version"
+    _description = "Snapshot of the matches schedule of a tournament"
+    _order = "create_date desc, id desc"
+
+    tournament_id = fields.Many2one(
+        comodel_name="event.tournament",
+        string="Tournament",
+        required=True,
+        ondelete="cascade",
+        index=True,
+    )
+    name = fields.Char(
+        required=True,
+    )
+    snapshot = fields.Json(
+        readonly=True,
+        help="A list of matches of the tournament and its sub tournaments, "
+        "each one being a list of its tournament, teams, court, schedule "
+        "and round.",
+    )
+    match_count = fields.Integer(
+        string="Matches",
+        compute="_compute_match_count",
+        store=True,
+    )
+    diff_summary = fields.Char(
+        string="Changes",
+        compute="_compute_diff_summary",
+        help="Changes to the current schedule when restoring this version.\n"
+        "Computed from all the current matches, only shown in the form view.",
+    )
+
+    @api.depends("snapshot")
+    def _compute_match_count(self):
+        for version in self:
+            version.match_count = len(version.snapshot or [])
+
+    def _compute_diff_summary(self):
+        for version in self:
+            removed, added, moved = version.get_diff()
+            version.diff_summary = _(
+                "{added_nbr} created, {moved_nbr} moved, {removed_nbr} deleted"
+            ).format(
+                added_nbr=len(added),
+                moved_nbr=len(moved),
+                removed_nbr=len(removed),
+            )
+
+    @api.model
+    def get_versions_limit(self):
+        """Number of versions kept for each tournament, 0 keeps all of them."""
+        get_param = self.env["ir.config_parameter"].sudo().get_param
+        return int(get_param(VERSIONS_LIMIT_PARAMETER, VERSIONS_LIMIT_DEFAULT))
+
+    @api.model
+    def unlink_old_versions(self, tournaments):
+        """Delete the oldest versions of `tournaments` beyond the limit."""
+        limit = self.get_versions_limit()
+        if limit <= 0:
+            return
+        for tournament in tournaments:
+            self.search(
+                [("tournament_id", "=", tournament.id)],
+                offset=limit,
+            ).unlink()
+
+    @api.model
+    def get_snapshot(self, matches):
+        """
+        Compact schedule of `matches`, in the same order.
+
+        :return: a list of lists of values of :data:`SNAPSHOT_FIELDS`,
+            datetimes are converted to strings.
+        """
+        snapshot = []
+        for values in matches.read(SNAPSHOT_FIELDS, load=None):
+            for field_name in SNAPSHOT_DATETIME_FIELDS:
+                values[field_name] = fields.Datetime.to_string(values[field_name])
+            values["team_ids"] = sorted(values["team_ids"])
+            snapshot.append([values[field_name] for field_name in SNAPSHOT_FIELDS])
+        return snapshot
+
+    def get_current_matches(self):
+        self.ensure_one()
+        tournament = self.tournament_id
+        return (tournament | tournament.get_children()).mapped("match_ids")
+
+    def get_diff(self, other=None):
+        """
+        Changes from the schedule of version `other`,
+        or from the current schedule if `other` is missing,
+        to the schedule of this version.
+
+        :return: a tuple of lists, see :func:`~..tools.scheduling.diff_schedules`.
+        """
+        self.ensure_one()
+        if other is None:
+            snapshot = self.get_snapshot(self.get_current_matches())
+        else:
+            snapshot = other.snapshot
+        return scheduling.diff_schedules(snapshot, self.snapshot, get_snapshot_key)
+
+    def restore(self):
+        """
+        Schedule the matches as in this version:
+        matches that are not done are deleted, moved or created
+        and the moved matches are written at once.
+        Moved matches also get back their round.
+        """
+        self.ensure_one()
+        matches = self.get_current_matches()
+        snapshot = self.snapshot
+        removed, added, moved = scheduling.diff_schedules(
+            self.get_snapshot(matches), snapshot, get_snapshot_key
+        )
+        matches.browse([matches[index].id for index in removed]).filtered(
+            lambda m: m.state != "done"
+        ).unlink()
+
+        schedules = []
+        rounds_matches = defaultdict(lambda: matches.browse())
+        for index, snapshot_index in moved:
+            match = matches[index]
+            if match.state == "done":
+                continue
+            values = get_snapshot_values(snapshot[snapshot_index])
+            round_values = tuple(
+                values[field_name] for field_name in SNAPSHOT_ROUND_FIELDS
+            )
+            if round_values != tuple(
+                match[field_name] for field_name in SNAPSHOT_ROUND_FIELDS
+            ):
+                rounds_matches[round_values] |= match
+            schedules.append(
+                (
+                    match,
+                    values["court_id"] or None,
+                    fields.Datetime.to_datetime(values["time_scheduled_start"]),
+                    fields.Datetime.to_datetime(values["time_scheduled_end"]),
+                )
+            )
+        matches.write_schedule(schedules)
+        for round_values, round_matches in rounds_matches.items():
+            round_matches.write(
+                {
+                    field_name: round_values[index]
+                    for index, field_name in enumerate(SNAPSHOT_ROUND_FIELDS)
+                }
+            )
+
+        new_matches_values = []
+        for snapshot_index in added:
+            values = get_snapshot_values(snapshot[snapshot_index])
+            values["team_ids"] = [Command.set(values["team_ids"])]
+            new_matches_values.append(values)
+        return matches.create(new_matches_values)
+
+    def action_restore(self):
+        self.ensure_one()
+        self.restore()
+        return self.tournament_id.action_view_matches()
@@ -13,6 +13,12 @@ class EventTournamentTeam(models.Model):
     _rec_name = "name"
 
     sequence = fields.Integer()
+    seed = fields.Integer(
+        help="Position in the bracket of elimination tournaments, "
+        "1 is the best team.\n"
+        "Teams without a seed are seeded from the current standings "
+        "when matches are generated.",
+    )
     event_id = fields.Many2one(related="tournament_id.event_id", readonly=True)
     tournament_id = fields.Many2one(
         comodel_name="event.tournament",
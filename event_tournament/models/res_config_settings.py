@@ -0,0 +1,44 @@
+#  Copyright 2023 Simone Rubino <daemo00@gmail.com>
+#  License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import fields, models
+
+from .event_tournament import SCHEDULING_WORKERS_PARAMETER
+from .event_tournament_match import COURT_EXCLUSION_PARAMETER
+from .event_tournament_schedule_version import (
+    VERSIONS_LIMIT_DEFAULT,
+    VERSIONS_LIMIT_PARAMETER,
+)
+
+
+class ResConfigSettings(models.TransientModel):
+    _inherit = "res.config.settings"
+
+    event_tournament_court_exclusion = fields.Boolean(
+        string="Prevent courts double-booking in the database",
+        config_parameter=COURT_EXCLUSION_PARAMETER,
+        help="Overlapping matches on the same court are rejected "
+        "by a database exclusion constraint, "
+        "that is also safe when many users reschedule matches at once.",
+    )
+    event_tournament_scheduling_workers = fields.Integer(
+        string="Parallel scheduling processes",
+        config_parameter=SCHEDULING_WORKERS_PARAMETER,
+        help="Tournaments that share no courts and no components "
+        "are scheduled in parallel by this number of processes, "
+        "-1 uses all the cores of the server, 0 or 1 disables it.\n"
+        "Only used when the server runs with prefork workers.",
+    )
+    event_tournament_schedule_versions_limit = fields.Integer(
+        string="Schedule versions kept",
+        config_parameter=VERSIONS_LIMIT_PARAMETER,
+        default=VERSIONS_LIMIT_DEFAULT,
+        help="Saved schedules kept for each tournament, "
+        "older ones are deleted when a new one is saved. "
+        "0 keeps all of them.",
+    )
+
+    def set_values(self):
+        res = super().set_values()
+        self.env["event.tournament.match"].update_court_exclusion_constraint()
+        return res
@@ -8,3 +8,4 @@ from . import test_event_tournament_match
 from . import test_event_tournament_match_mode
 from . import test_event_tournament_team
 from . import test_import_csv_bv4w
+from . import test_scheduling
@@ -2,11 +2,15 @@
 #  License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 import itertools
 from datetime import timedelta
+from math import comb
+from unittest.mock import patch
 
 from odoo import fields
 from odoo.exceptions import UserError, ValidationError
 from odoo.fields import Command, first
+from odoo.tools import config
 
+from ..models.event_tournament_schedule_version import VERSIONS_LIMIT_PARAMETER
 from .test_common import COMPONENT_NBR, TEAM_NBR, TestCommon
 
 
@@ -77,6 +81,72 @@ class TestEventTournament(TestCommon):
             ),
         )
 
+    def test_compute_match_count_estimated_share_components(self):
+        """
+        Create a tournament sharing components,
+        check that matches between teams having common components
+        are not estimated.
+        """
+        tournament = first(self.tournaments)
+        tournament.share_components = True
+        team, other_team, *_other_teams = tournament.team_ids
+        teams_nbr = len(tournament.team_ids)
+        self.assertEqual(tournament.match_count_estimated, comb(teams_nbr, 2))
+
+        other_team.component_ids = [Command.link(first(team.component_ids).id)]
+        self.assertEqual(tournament.match_count_estimated, comb(teams_nbr, 2) - 1)
+
+    def test_iter_match_tuples(self):
+        """
+        Create a tournament with sub tournaments,
+        check that the teams of each match are generated lazily.
+        """
+        tournament, *children = self.tournaments.filtered(
+            lambda t: t.event_id == first(self.events)
+        )
+        tournament.child_ids = [Command.set([child.id for child in children])]
+        matches_teams = tournament.iter_match_tuples()
+        self.assertIs(iter(matches_teams), matches_teams)
+        self.assertEqual(
+            sum(1 for _match_teams in matches_teams),
+            tournament.match_count_estimated,
+        )
+
+    def test_get_match_tuples_share_components(self):
+        """
+        Create a tournament sharing components with 3 teams per match,
+        check that no component plays in two teams of the same match.
+        """
+        tournament = first(self.tournaments)
+        tournament.share_components = True
+        tournament.match_teams_nbr = 3
+        team, other_team, *_other_teams = tournament.team_ids
+        other_team.component_ids = [Command.link(first(team.component_ids).id)]
+
+        matches_teams = tournament.get_match_tuples()
+        # Only the tuples having both team and other_team are excluded
+        self.assertEqual(len(matches_teams), comb(TEAM_NBR, 3) - (TEAM_NBR - 2))
+        for match_teams in matches_teams:
+            for team_1, team_2 in itertools.combinations(match_teams, 2):
+                self.assertFalse(team_1.component_ids & team_2.component_ids)
+
+    def test_compute_match_count_estimated_children(self):
+        """
+        Create a tournament with sub tournaments,
+        check that matches of sub tournaments are estimated too.
+        """
+        tournament, *children = self.tournaments.filtered(
+            lambda t: t.event_id == first(self.events)
+        )
+        tournament.child_ids = [Command.set([child.id for child in children])]
+        self.assertEqual(
+            tournament.match_count_estimated,
+            sum(
+                comb(len(tourn.team_ids), tourn.match_teams_nbr)
+                for tourn in tournament | tournament.child_ids
+            ),
+        )
+
     def test_compute_team_count(self):
         """
         Create a tournament with teams,
@@ -145,6 +215,606 @@ class TestEventTournament(TestCommon):
         matches = tournament.generate_matches()
         self.assertEqual(len(matches), tournament.match_count_estimated)
 
+    def test_generate_matches_seed(self):
+        """
+        Generate randomized matches twice with the same seed,
+        check that the same schedule is generated.
+        """
+        tournament = first(self.tournaments)
+        tournament.randomize_matches_generation = True
+        tournament.reset_matches_before_generation = True
+        tournament.start_datetime = fields.Datetime.now()
+        tournament.end_datetime = fields.Datetime.now() + timedelta(days=1)
+        tournament.court_ids = self.courts
+
+        def get_schedule(matches):
+            return sorted(
+                (
+                    tuple(match.team_ids.ids),
+                    match.court_id.id,
+                    match.time_scheduled_start,
+                )
+                for match in matches
+            )
+
+        schedule = get_schedule(tournament.generate_matches())
+        self.assertEqual(get_schedule(tournament.generate_matches()), schedule)
+
+    def test_restore_schedule_version(self):
+        """
+        Generate matches, save the schedule, generate again with another seed
+        and change the round of a match,
+        check that restoring the version brings back the saved schedule.
+        """
+        tournament = first(self.tournaments)
+        tournament.randomize_matches_generation = True
+        tournament.reset_matches_before_generation = True
+        tournament.start_datetime = fields.Datetime.now()
+        tournament.end_datetime = fields.Datetime.now() + timedelta(days=1)
+        tournament.court_ids = self.courts
+        tournament.generate_matches()
+        version = tournament.save_schedule_version()
+        self.assertEqual(version.match_count, tournament.match_count_estimated)
+
+        tournament.random_seed += 1
+        tournament.generate_matches()
+        first(tournament.match_ids).round_number += 1
+        removed, added, moved = version.get_diff()
+        self.assertFalse(removed)
+        self.assertFalse(added)
+
+        version.restore()
+        self.assertEqual(version.get_diff(), ([], [], []))
+
+    def test_save_schedule_version_limit(self):
+        """
+        Save more schedule versions than the limit,
+        check that only the most recent ones are kept.
+        """
+        self.env["ir.config_parameter"].sudo().set_param(VERSIONS_LIMIT_PARAMETER, 2)
+        tournament = first(self.tournaments)
+        versions = [tournament.save_schedule_version(str(index)) for index in range(3)]
+        self.assertFalse(versions[0].exists())
+        self.assertEqual(
+            set(tournament.schedule_version_ids.mapped("name")), {"1", "2"}
+        )
+
+    def test_generate_matches_savepoint(self):
+        """
+        Create a tournament scheduling one match at a time,
+        check that all the estimated matches are created.
+        """
+        tournament = first(self.tournaments)
+        tournament.scheduling_mode = "savepoint"
+        tournament.start_datetime = fields.Datetime.now()
+        tournament.end_datetime = fields.Datetime.now() + timedelta(days=1)
+        tournament.court_ids = self.courts
+        matches = tournament.generate_matches()
+        self.assertEqual(len(matches), tournament.match_count_estimated)
+
+    def test_generate_matches_in_memory_existing_matches(self):
+        """
+        Generate matches for two tournaments sharing the same courts,
+        check that matches of the second tournament
+        do not overlap matches of the first one.
+        """
+        tournament, other_tournament = self.tournaments[:2]
+        self.assertEqual(tournament.event_id, other_tournament.event_id)
+        courts = tournament.event_id.court_ids
+        for tourn in tournament | other_tournament:
+            tourn.scheduling_mode = "memory"
+            tourn.start_datetime = fields.Datetime.now()
+            tourn.end_datetime = fields.Datetime.now() + timedelta(days=1)
+            tourn.court_ids = courts
+        matches = tournament.generate_matches()
+        other_matches = other_tournament.generate_matches()
+        self.assertEqual(len(other_matches), other_tournament.match_count_estimated)
+
+        for match in matches:
+            for other_match in other_matches.filtered(
+                lambda m, court=match.court_id: m.court_id == court
+            ):
+                self.assertTrue(
+                    other_match.time_scheduled_start >= match.time_scheduled_end
+                    or other_match.time_scheduled_end <= match.time_scheduled_start
+                )
+
+    def test_generate_matches_min_rest(self):
+        """
+        Create a tournament with a minimum rest between matches,
+        check that each component rests at least that much between its matches.
+        """
+        tournament = first(self.tournaments)
+        tournament.scheduling_mode = "memory"
+        tournament.min_rest_duration = 1
+        tournament.start_datetime = fields.Datetime.now()
+        tournament.end_datetime = fields.Datetime.now() + timedelta(days=2)
+        tournament.court_ids = self.courts
+        matches = tournament.generate_matches()
+        self.assertEqual(len(matches), tournament.match_count_estimated)
+
+        for component in matches.component_ids:
+            component_matches = matches.filtered(
+                lambda m, c=component: c in m.component_ids
+            ).sorted("time_scheduled_start")
+            for index in range(1, len(component_matches)):
+                previous_match = component_matches[index - 1]
+                match = component_matches[index]
+                self.assertGreaterEqual(
+                    match.time_scheduled_start - previous_match.time_scheduled_end,
+                    timedelta(hours=1),
+                )
+
+    def test_generate_matches_availability(self):
+        """
+        Create a tournament with a component arriving late,
+        check that the component only plays once arrived.
+        """
+        tournament = first(self.tournaments)
+        tournament.scheduling_mode = "memory"
+        tournament.start_datetime = fields.Datetime.now()
+        tournament.end_datetime = fields.Datetime.now() + timedelta(days=1)
+        tournament.court_ids = tournament.event_id.court_ids
+        component = first(first(tournament.team_ids).component_ids)
+        arrival = tournament.start_datetime + timedelta(hours=3)
+        component.tournament_availability_ids = [
+            Command.create(
+                {
+                    "time_start": arrival,
+                    "time_end": tournament.end_datetime,
+                }
+            )
+        ]
+        matches = tournament.generate_matches()
+        self.assertEqual(len(matches), tournament.match_count_estimated)
+
+        component_matches = matches.filtered(lambda m: component in m.component_ids)
+        self.assertTrue(component_matches)
+        for match in component_matches:
+            self.assertGreaterEqual(match.time_scheduled_start, arrival)
+
+    def test_simulate_matches(self):
+        """
+        Create a tournament and simulate its matches with longer matches,
+        check that no match is created and the simulated schedule ends later.
+        """
+        tournament = first(self.tournaments)
+        tournament.start_datetime = fields.Datetime.now()
+        tournament.end_datetime = fields.Datetime.now() + timedelta(days=1)
+        tournament.court_ids = tournament.event_id.court_ids
+        simulation = tournament.simulate_matches()
+        self.assertFalse(tournament.match_ids)
+        self.assertEqual(len(simulation["matches"]), tournament.match_count_estimated)
+        self.assertEqual(
+            simulation["metrics"]["matches_nbr"], tournament.match_count_estimated
+        )
+
+        long_simulation = tournament.with_context(
+            scheduling_variant={"match_duration": tournament.match_duration * 2},
+        ).simulate_matches()
+        self.assertFalse(tournament.match_ids)
+        self.assertGreater(
+            long_simulation["metrics"]["time_end"],
+            simulation["metrics"]["time_end"],
+        )
+
+    def test_generate_matches_round_robin(self):
+        """
+        Create a round robin tournament with as many courts as matches per round,
+        check that each round is played in a single time slot
+        and each team plays once per round.
+        """
+        tournament = first(self.tournaments)
+        tournament.tournament_format = "round_robin"
+        tournament.start_datetime = fields.Datetime.now()
+        tournament.end_datetime = fields.Datetime.now() + timedelta(days=1)
+        tournament.court_ids = tournament.event_id.court_ids
+        teams = tournament.team_ids
+        self.assertEqual(len(tournament.court_ids), len(teams) // 2)
+        matches = tournament.generate_matches()
+        self.assertEqual(len(matches), tournament.match_count_estimated)
+        self.assertEqual(set(matches.mapped("round_number")), set(range(1, len(teams))))
+
+        previous_start = False
+        for round_number in range(1, len(teams)):
+            round_matches = matches.filtered(
+                lambda m, r=round_number: m.round_number == r
+            )
+            self.assertEqual(round_matches.team_ids, teams)
+            self.assertEqual(len(round_matches.team_ids), 2 * len(round_matches))
+            round_start = set(round_matches.mapped("time_scheduled_start"))
+            self.assertEqual(len(round_start), 1)
+            round_start = round_start.pop()
+            if previous_start:
+                self.assertGreater(round_start, previous_start)
+            previous_start = round_start
+
+    def test_generate_matches_swiss(self):
+        """
+        Create a Swiss-system tournament and play its first round,
+        check that the second round pairs the winners and has no rematches.
+        """
+        tournament = first(self.tournaments)
+        tournament.tournament_format = "swiss"
+        tournament.start_datetime = fields.Datetime.now()
+        tournament.end_datetime = fields.Datetime.now() + timedelta(days=1)
+        tournament.court_ids = tournament.event_id.court_ids
+        teams = tournament.team_ids
+        first_round = tournament.generate_matches()
+        self.assertEqual(len(first_round), len(teams) // 2)
+        self.assertEqual(set(first_round.mapped("round_number")), {1})
+        self.assertEqual(first_round.team_ids, teams)
+
+        for match in first_round:
+            match.update(self.get_match_lines_1_2(match.team_ids))
+            match.action_done()
+        second_round = tournament.generate_matches()
+        self.assertEqual(set(second_round.mapped("round_number")), {2})
+        self.assertEqual(second_round.team_ids, teams)
+        first_round_teams = {frozenset(m.team_ids.ids) for m in first_round}
+        for match in second_round:
+            self.assertNotIn(frozenset(match.team_ids.ids), first_round_teams)
+        winners = first_round.mapped("winner_team_id")
+        self.assertTrue(second_round.filtered(lambda m: m.team_ids == winners))
+
+    def test_generate_matches_swiss_partial_round(self):
+        """
+        Create a Swiss-system tournament and play part of its first round,
+        check that the next round can't be paired.
+        """
+        tournament = first(self.tournaments)
+        tournament.tournament_format = "swiss"
+        tournament.reset_matches_before_generation = True
+        tournament.start_datetime = fields.Datetime.now()
+        tournament.end_datetime = fields.Datetime.now() + timedelta(days=1)
+        tournament.court_ids = tournament.event_id.court_ids
+        first_round = tournament.generate_matches()
+        match = first(first_round)
+        match.update(self.get_match_lines_1_2(match.team_ids))
+        match.action_done()
+
+        with self.assertRaises(UserError) as ue:
+            tournament.generate_matches()
+        self.assertIn("must be done", ue.exception.args[0])
+        self.assertEqual(tournament.match_ids, first_round)
+
+    def test_generate_matches_knockout(self):
+        """
+        Create a single elimination tournament and play its first round,
+        check that the final is created between the winners.
+        """
+        tournament = first(self.tournaments)
+        tournament.tournament_format = "knockout"
+        tournament.start_datetime = fields.Datetime.now()
+        tournament.end_datetime = fields.Datetime.now() + timedelta(days=1)
+        tournament.court_ids = tournament.event_id.court_ids
+        teams = tournament.team_ids
+        first_round = tournament.generate_matches()
+        self.assertEqual(len(first_round), len(teams) // 2)
+        self.assertEqual(set(first_round.mapped("bracket")), {"winners"})
+        self.assertEqual(set(first_round.mapped("round_number")), {1})
+        self.assertEqual(first_round.team_ids, teams)
+        self.assertEqual(set(teams.mapped("seed")), set(range(1, len(teams) + 1)))
+
+        for match in first_round:
+            match.update(self.get_match_lines_1_2(match.team_ids))
+            match.action_done()
+        final = tournament.match_ids - first_round
+        self.assertEqual(len(final), 1)
+        self.assertEqual(final.round_number, 2)
+        self.assertEqual(final.team_ids, first_round.mapped("winner_team_id"))
+        self.assertGreaterEqual(
+            final.time_scheduled_start,
+            max(first_round.mapped("time_scheduled_end")),
+        )
+
+    def test_action_draft_knockout(self):
+        """
+        Play the first round of a single elimination tournament
+        and reset a match to draft,
+        check that the final is deleted until the match is done again
+        and that the match can't be reset once the final is done.
+        """
+        tournament = first(self.tournaments)
+        tournament.tournament_format = "knockout"
+        tournament.start_datetime = fields.Datetime.now()
+        tournament.end_datetime = fields.Datetime.now() + timedelta(days=1)
+        tournament.court_ids = tournament.event_id.court_ids
+        first_round = tournament.generate_matches()
+        for match in first_round:
+            match.update(self.get_match_lines_1_2(match.team_ids))
+            match.action_done()
+        match = first(first_round)
+
+        match.action_draft()
+        self.assertEqual(tournament.match_ids, first_round)
+
+        match.action_done()
+        final = tournament.match_ids - first_round
+        self.assertEqual(final.team_ids, first_round.mapped("winner_team_id"))
+        final.update(self.get_match_lines_1_2(final.team_ids))
+        final.action_done()
+        with self.assertRaises(UserError) as ue:
+            match.action_draft()
+        self.assertIn(final.display_name, ue.exception.args[0])
+
+    def test_simulate_matches_knockout(self):
+        """
+        Simulate the matches of a single elimination tournament,
+        check that the teams are not seeded.
+        """
+        tournament = first(self.tournaments)
+        tournament.tournament_format = "knockout"
+        tournament.start_datetime = fields.Datetime.now()
+        tournament.end_datetime = fields.Datetime.now() + timedelta(days=1)
+        tournament.court_ids = tournament.event_id.court_ids
+        teams = tournament.team_ids
+        simulation = tournament.simulate_matches()
+        self.assertEqual(len(simulation["matches"]), len(teams) // 2)
+        self.assertFalse(any(teams.mapped("seed")))
+
+    def test_generate_matches_double_elimination(self):
+        """
+        Create a double elimination tournament and play its first round,
+        check that winners and losers play their next matches.
+        """
+        tournament = first(self.tournaments)
+        tournament.tournament_format = "double_elimination"
+        tournament.start_datetime = fields.Datetime.now()
+        tournament.end_datetime = fields.Datetime.now() + timedelta(days=1)
+        tournament.court_ids = tournament.event_id.court_ids
+        first_round = tournament.generate_matches()
+        self.assertEqual(tournament.match_count_estimated, 6)
+
+        for match in first_round:
+            match.update(self.get_match_lines_1_2(match.team_ids))
+            match.action_done()
+        winners = first_round.mapped("winner_team_id")
+        second_round = tournament.match_ids - first_round
+        winners_match = second_round.filtered(lambda m: m.bracket == "winners")
+        self.assertEqual(winners_match.team_ids, winners)
+        losers_match = second_round.filtered(lambda m: m.bracket == "losers")
+        self.assertEqual(losers_match.team_ids, first_round.team_ids - winners)
+
+    def test_generate_playoff(self):
+        """
+        Create a tournament with sub tournaments and play their matches,
+        check that the playoff is played after them by their best teams.
+        """
+        tournament, *pools = self.tournaments.filtered(
+            lambda t: t.event_id == first(self.events)
+        )
+        tournament.child_ids = [Command.set([pool.id for pool in pools])]
+        tournament.qualified_per_pool = 2
+        pools_matches = self.match_model.browse()
+        for pool in tournament.child_ids:
+            pool.start_datetime = fields.Datetime.now()
+            pool.end_datetime = fields.Datetime.now() + timedelta(days=1)
+            pool.court_ids = pool.event_id.court_ids
+            pools_matches |= pool.generate_matches()
+        for match in pools_matches:
+            match.update(self.get_match_lines_1_2(match.team_ids))
+            match.action_done()
+
+        playoff = tournament.generate_playoff()
+        self.assertEqual(tournament.playoff_tournament_id, playoff)
+        self.assertEqual(len(playoff.team_ids), 2 * len(pools))
+        self.assertEqual(playoff.tournament_format, "knockout")
+        for pool in tournament.child_ids:
+            best_teams = pool.get_teams_ranking()[:2]
+            self.assertEqual(
+                playoff.team_ids.filtered(
+                    lambda t, p=pool: t.component_ids & p.component_ids
+                ).component_ids,
+                best_teams.component_ids,
+            )
+        self.assertTrue(playoff.match_ids)
+        pools_end = max(pools_matches.mapped("time_scheduled_end"))
+        for match in playoff.match_ids:
+            self.assertGreaterEqual(match.time_scheduled_start, pools_end)
+
+    def test_get_schedule_bounds(self):
+        """
+        Create a tournament with enough time for its matches
+        and another one without enough time,
+        check that only the latter is reported as infeasible.
+        """
+        tournament = first(self.tournaments)
+        start = fields.Datetime.now()
+        tournament.start_datetime = start
+        tournament.end_datetime = start + timedelta(days=1)
+        tournament.court_ids = tournament.event_id.court_ids
+        matches_nbr = tournament.match_count_estimated
+        courts_nbr = len(tournament.court_ids)
+        bounds = tournament.get_schedule_bounds()[tournament]
+        self.assertTrue(bounds.feasible)
+        self.assertEqual(bounds.matches_nbr, matches_nbr)
+        self.assertEqual(
+            bounds.min_end,
+            start + timedelta(hours=-(-matches_nbr // courts_nbr)),
+        )
+        action = tournament.action_check_schedule()
+        self.assertEqual(action["params"]["type"], "success")
+
+        tournament.end_datetime = start + timedelta(hours=1)
+        bounds = tournament.get_schedule_bounds()[tournament]
+        self.assertFalse(bounds.feasible)
+        self.assertEqual(bounds.slots_nbr, courts_nbr)
+        action = tournament.action_check_schedule()
+        self.assertEqual(action["params"]["type"], "warning")
+        self.assertIn(tournament.name, action["params"]["message"])
+
+    def test_optimize_schedule(self):
+        """
+        Generate matches, play one and delay another one,
+        check that optimizing the schedule brings back the delayed match
+        without moving the done match.
+        """
+        tournament = first(self.tournaments)
+        tournament.start_datetime = fields.Datetime.now()
+        tournament.end_datetime = fields.Datetime.now() + timedelta(days=1)
+        tournament.court_ids = tournament.event_id.court_ids
+        tournament.optimization_time_budget = 1
+        matches = tournament.generate_matches()
+        done_match = first(matches)
+        done_match.update(self.get_match_lines_1_2(done_match.team_ids))
+        done_match.action_done()
+        done_schedule = (
+            done_match.court_id,
+            done_match.time_scheduled_start,
+            done_match.time_scheduled_end,
+        )
+        delayed_match = matches[-1]
+        delayed_match.write(
+            {
+                "time_scheduled_start": tournament.end_datetime - timedelta(hours=1),
+                "time_scheduled_end": tournament.end_datetime,
+            }
+        )
+
+        initial_cost, best_cost = tournament.optimize_schedule()
+        self.assertLess(best_cost, initial_cost)
+        self.assertLess(
+            delayed_match.time_scheduled_end,
+            tournament.end_datetime,
+        )
+        self.assertEqual(
+            (
+                done_match.court_id,
+                done_match.time_scheduled_start,
+                done_match.time_scheduled_end,
+            ),
+            done_schedule,
+        )
+        for slot in delayed_match.component_slot_ids:
+            self.assertEqual(slot.time_start, delayed_match.time_scheduled_start)
+            self.assertEqual(slot.time_end, delayed_match.time_scheduled_end)
+
+    def test_optimize_schedule_children(self):
+        """
+        Generate matches for sub tournaments on distinct courts and times,
+        check that optimizing the schedule keeps each match
+        on the courts and in the time of its tournament.
+        """
+        tournament, child, other_child = self.tournaments.filtered(
+            lambda t: t.event_id == first(self.events)
+        )
+        tournament.child_ids = [Command.set([child.id, other_child.id])]
+        court, other_court = tournament.event_id.court_ids[:2]
+        now = fields.Datetime.now()
+        for tourn, courts, start in (
+            (tournament, court | other_court, now),
+            (child, court, now),
+            (other_child, other_court, now + timedelta(hours=2)),
+        ):
+            tourn.start_datetime = start
+            tourn.end_datetime = now + timedelta(days=1)
+            tourn.court_ids = courts
+        tournament.optimization_time_budget = 1
+        tournament.generate_matches()
+
+        tournament.optimize_schedule()
+        for tourn in child | other_child:
+            for match in tourn.match_ids:
+                self.assertIn(match.court_id, tourn.court_ids)
+                self.assertGreaterEqual(
+                    match.time_scheduled_start, tourn.start_datetime
+                )
+
+    def test_generate_tournaments_matches(self):
+        """
+        Generate the matches of all the tournaments of an event together,
+        check that they share the courts
+        and that the tournament with a higher weight ends first.
+        """
+        event = first(self.events)
+        tournaments = event.tournament_ids
+        for tournament in tournaments:
+            tournament.start_datetime = fields.Datetime.now()
+            tournament.end_datetime = fields.Datetime.now() + timedelta(days=1)
+            tournament.court_ids = event.court_ids
+        heavy_tournament, *other_tournaments = tournaments
+        heavy_tournament.scheduling_weight = 2
+
+        matches = event.generate_tournaments_matches()
+        self.assertEqual(len(matches), sum(tournaments.mapped("match_count_estimated")))
+        for match in matches:
+            for other_match in matches - match:
+                if match.court_id != other_match.court_id:
+                    continue
+                self.assertTrue(
+                    other_match.time_scheduled_start >= match.time_scheduled_end
+                    or other_match.time_scheduled_end <= match.time_scheduled_start
+                )
+
+        def get_end(tourn):
+            return max(
+                matches.filtered(lambda m: m.tournament_id == tourn).mapped(
+                    "time_scheduled_end"
+                )
+            )
+
+        for other_tournament in other_tournaments:
+            self.assertLess(get_end(heavy_tournament), get_end(other_tournament))
+
+    def test_generate_tournaments_matches_version(self):
+        """
+        Generate the matches of all the tournaments of an event twice,
+        check that the schedule is saved before the matches are deleted.
+        """
+        event = first(self.events)
+        tournaments = event.tournament_ids
+        for tournament in tournaments:
+            tournament.reset_matches_before_generation = True
+            tournament.start_datetime = fields.Datetime.now()
+            tournament.end_datetime = fields.Datetime.now() + timedelta(days=1)
+            tournament.court_ids = event.court_ids
+        event.generate_tournaments_matches()
+        self.assertFalse(tournaments.mapped("schedule_version_ids"))
+
+        event.generate_tournaments_matches()
+        for tournament in tournaments:
+            version = tournament.schedule_version_ids
+            self.assertEqual(len(version), 1)
+            self.assertEqual(version.match_count, tournament.match_count_estimated)
+
+    def test_generate_tournaments_matches_parallel(self):
+        """
+        Generate the matches of tournaments on different courts
+        with parallel scheduling enabled in a prefork server,
+        check that they are scheduled in independent groups.
+        """
+        self.env["ir.config_parameter"].sudo().set_param(
+            "event_tournament.scheduling_workers", 2
+        )
+        tournament_model = self.env["event.tournament"]
+        with patch.dict(config.options, {"workers": 0}):
+            self.assertEqual(tournament_model.get_scheduling_workers_nbr(), 0)
+        patcher = patch.dict(config.options, {"workers": 2})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.assertEqual(tournament_model.get_scheduling_workers_nbr(), 2)
+        event = first(self.events)
+        tournaments = event.tournament_ids
+        first_court, second_court = event.court_ids
+        for index, tournament in enumerate(tournaments):
+            tournament.start_datetime = fields.Datetime.now()
+            tournament.end_datetime = fields.Datetime.now() + timedelta(days=1)
+            tournament.court_ids = first_court if index % 2 else second_court
+        self.assertEqual(len(tournaments.get_independent_groups()), 2)
+
+        matches = event.generate_tournaments_matches()
+        self.assertEqual(len(matches), sum(tournaments.mapped("match_count_estimated")))
+        for match in matches:
+            self.assertEqual(match.court_id, match.tournament_id.court_ids)
+            for other_match in matches - match:
+                if match.court_id != other_match.court_id:
+                    continue
+                self.assertTrue(
+                    other_match.time_scheduled_start >= match.time_scheduled_end
+                    or other_match.time_scheduled_end <= match.time_scheduled_start
+                )
+
     def test_regenerate_matches(self):
         """
         Create a tournament,
@@ -1,10 +1,14 @@
 #  Copyright 2020 ~ 2023 Simone Rubino <daemo00@gmail.com>
 #  License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+from datetime import timedelta
+
 import psycopg2
 
+from odoo import fields
 from odoo.fields import first
 from odoo.tools import mute_logger
 
+from ..models.event_tournament_match import COURT_EXCLUSION_PARAMETER
 from .test_common import TestCommon
 
 
@@ -43,3 +47,149 @@ class TestEventTournamentCourt(TestCommon):
         """
         court = first(self.courts)
         self.assertTrue(court.copy())
+
+    def test_reschedule_matches_delay(self):
+        """
+        Delay a court when its second match starts,
+        check that only the following matches are moved after the delay.
+        """
+        court = first(self.courts)
+        tournament = first(self.tournaments)
+        tournament.start_datetime = fields.Datetime.now()
+        tournament.end_datetime = fields.Datetime.now() + timedelta(days=1)
+        tournament.court_ids = court
+        matches = tournament.generate_matches().sorted("time_scheduled_start")
+        first_match, second_match = matches[:2]
+        delay_start = second_match.time_scheduled_start
+        delay_end = delay_start + timedelta(minutes=30)
+
+        moved_matches = court.reschedule_matches(delay_start, delay_end)
+        self.assertNotIn(first_match, moved_matches)
+        self.assertIn(second_match, moved_matches)
+        self.assertEqual(second_match.time_scheduled_start, delay_end)
+        for match in matches:
+            self.assertTrue(
+                match.time_scheduled_end <= delay_start
+                or match.time_scheduled_start >= delay_end
+            )
+
+    def test_shift_matches(self):
+        """
+        Shift the matches of a court from its second match,
+        check that all the following matches are delayed.
+        """
+        court = first(self.courts)
+        tournament = first(self.tournaments)
+        tournament.start_datetime = fields.Datetime.now()
+        tournament.end_datetime = fields.Datetime.now() + timedelta(days=1)
+        tournament.court_ids = court
+        matches = tournament.generate_matches().sorted("time_scheduled_start")
+        schedules = {
+            match: (match.time_scheduled_start, match.time_scheduled_end)
+            for match in matches
+        }
+        first_match, second_match = matches[:2]
+        delay = timedelta(minutes=30)
+
+        shifted_matches = court.shift_matches(delay, second_match.time_scheduled_start)
+        self.assertEqual(shifted_matches, matches - first_match)
+        self.assertEqual(
+            (first_match.time_scheduled_start, first_match.time_scheduled_end),
+            schedules[first_match],
+        )
+        for match in shifted_matches:
+            start, end = schedules[match]
+            self.assertEqual(match.time_scheduled_start, start + delay)
+            self.assertEqual(match.time_scheduled_end, end + delay)
+
+    def test_shift_matches_court_exclusion(self):
+        """
+        Prevent courts double-booking in the database
+        and shift back-to-back matches of a court,
+        check that all the matches are delayed.
+        """
+        self.env["ir.config_parameter"].sudo().set_param(
+            COURT_EXCLUSION_PARAMETER, True
+        )
+        self.match_model.update_court_exclusion_constraint()
+        tournament = first(self.tournaments)
+        court = first(tournament.court_ids)
+        teams = tournament.team_ids
+        start = fields.Datetime.now()
+        matches = self.match_model.browse()
+        for index in range(2):
+            match_start = start + timedelta(hours=index)
+            matches |= self.match_model.create(
+                {
+                    "tournament_id": tournament.id,
+                    "court_id": court.id,
+                    "team_ids": teams[index * 2 : index * 2 + 2].ids,
+                    "time_scheduled_start": match_start,
+                    "time_scheduled_end": match_start + timedelta(hours=1),
+                }
+            )
+        delay = timedelta(minutes=30)
+
+        shifted_matches = court.shift_matches(delay, start)
+        self.assertEqual(shifted_matches, matches)
+        for index, match in enumerate(matches):
+            self.assertEqual(
+                match.time_scheduled_start, start + timedelta(hours=index) + delay
+            )
+
+    def test_update_slots(self):
+        """
+        Generate matches in an available court,
+        check that its slots are the matches and the free time in between.
+        """
+        court = first(self.courts)
+        now = fields.Datetime.now()
+        court.time_availability_start = now
+        court.time_availability_end = now + timedelta(days=1)
+        tournament = first(self.tournaments)
+        tournament.start_datetime = now
+        tournament.end_datetime = now + timedelta(days=1)
+        tournament.court_ids = court
+        matches = tournament.generate_matches().sorted("time_scheduled_start")
+        last_match = matches[-1]
+
+        match_slots = court.slot_ids.filtered("match_id")
+        self.assertEqual(match_slots.mapped("match_id"), matches)
+        free_slot = court.slot_ids - match_slots
+        self.assertEqual(free_slot.time_start, last_match.time_scheduled_end)
+        self.assertEqual(free_slot.time_end, court.time_availability_end)
+
+        slot_model = self.env["event.tournament.court.slot"]
+        match_duration = tournament.get_match_duration()
+        self.assertEqual(
+            slot_model.get_next_free_start(court, match_duration, now),
+            last_match.time_scheduled_end,
+        )
+
+        last_match.unlink()
+        free_slot = court.slot_ids - court.slot_ids.filtered("match_id")
+        self.assertEqual(free_slot.time_start, matches[-2].time_scheduled_end)
+
+        # Only the slots around the moved match are rebuilt
+        first_match = matches[0]
+        moved_start = court.time_availability_end - match_duration
+        first_match.write(
+            {
+                "time_scheduled_start": moved_start,
+                "time_scheduled_end": court.time_availability_end,
+            }
+        )
+        free_slots = court.slot_ids.filtered(lambda s: not s.match_id).sorted(
+            "time_start"
+        )
+        self.assertEqual(
+            [(slot.time_start, slot.time_end) for slot in free_slots],
+            [
+                (now, matches[1].time_scheduled_start),
+                (matches[-2].time_scheduled_end, moved_start),
+            ],
+        )
+        self.assertEqual(
+            court.slot_ids.filtered("match_id").mapped("match_id"),
+            matches - last_match,
+        )
@@ -1,7 +1,12 @@
 #  Copyright 2019 ~ 2023 Simone Rubino <daemo00@gmail.com>
 #  License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
-from odoo.exceptions import UserError
+from datetime import timedelta
 
+from odoo import fields
+from odoo.exceptions import UserError, ValidationError
+from odoo.fields import first
+
+from ..models.event_tournament_match import COURT_EXCLUSION_PARAMETER
 from .test_common import TestCommon
 
 
@@ -104,3 +109,208 @@ class TestEventTournamentMatch(TestCommon):
         exc_message = ue.exception.args[0]
 
         self.assertIn(str(win_tie_break_points), exc_message)
+
+    def test_get_schedule_conflicts(self):
+        """
+        Create matches on the same court and with common components,
+        check that overlapping matches are not valid.
+        """
+        tournament = first(self.tournaments)
+        courts = tournament.event_id.court_ids
+        court, other_court = courts[:2]
+        tournament.court_ids = courts
+        teams = tournament.team_ids
+        start = fields.Datetime.now()
+        matches = self.match_model.create(
+            [
+                {
+                    "tournament_id": tournament.id,
+                    "court_id": court.id,
+                    "team_ids": teams[:2].ids,
+                    "time_scheduled_start": start,
+                    "time_scheduled_end": start + timedelta(hours=1),
+                },
+                {
+                    "tournament_id": tournament.id,
+                    "court_id": court.id,
+                    "team_ids": teams[2:4].ids,
+                    "time_scheduled_start": start + timedelta(hours=1),
+                    "time_scheduled_end": start + timedelta(hours=2),
+                },
+            ]
+        )
+        self.assertFalse(matches.get_schedule_conflicts())
+
+        with self.assertRaises(ValidationError) as ve, self.env.cr.savepoint():
+            matches[1].time_scheduled_start = start + timedelta(minutes=30)
+        self.assertIn("is overlapping", ve.exception.args[0])
+
+        with self.assertRaises(ValidationError) as ve, self.env.cr.savepoint():
+            self.match_model.create(
+                {
+                    "tournament_id": tournament.id,
+                    "court_id": other_court.id,
+                    "team_ids": (teams[0] | teams[2]).ids,
+                    "time_scheduled_start": start,
+                    "time_scheduled_end": start + timedelta(hours=1),
+                }
+            )
+        self.assertIn("is already playing", ve.exception.args[0])
+
+    def test_court_exclusion_constraint(self):
+        """
+        Prevent courts double-booking in the database,
+        check that overlapping matches on the same court are not valid.
+        """
+        self.env["ir.config_parameter"].sudo().set_param(
+            COURT_EXCLUSION_PARAMETER, True
+        )
+        self.match_model.update_court_exclusion_constraint()
+        tournament = first(self.tournaments)
+        court = first(tournament.court_ids)
+        teams = tournament.team_ids
+        start = fields.Datetime.now()
+        match = self.match_model.create(
+            {
+                "tournament_id": tournament.id,
+                "court_id": court.id,
+                "team_ids": teams[:2].ids,
+                "time_scheduled_start": start,
+                "time_scheduled_end": start + timedelta(hours=1),
+            }
+        )
+
+        with self.assertRaises(ValidationError) as ve:
+            self.match_model.create(
+                {
+                    "tournament_id": tournament.id,
+                    "court_id": court.id,
+                    "team_ids": teams[2:4].ids,
+                    "time_scheduled_start": start + timedelta(minutes=30),
+                    "time_scheduled_end": start + timedelta(hours=2),
+                }
+            )
+        exc_message = ve.exception.args[0]
+        self.assertIn("is overlapping", exc_message)
+        self.assertIn(match.display_name, exc_message)
+
+    def test_court_exclusion_constraint_write(self):
+        """
+        Prevent courts double-booking in the database,
+        check that moving a match onto an occupied court slot is not valid.
+        """
+        self.env["ir.config_parameter"].sudo().set_param(
+            COURT_EXCLUSION_PARAMETER, True
+        )
+        self.match_model.update_court_exclusion_constraint()
+        tournament = first(self.tournaments)
+        court = first(tournament.court_ids)
+        teams = tournament.team_ids
+        start = fields.Datetime.now()
+        match = self.match_model.create(
+            {
+                "tournament_id": tournament.id,
+                "court_id": court.id,
+                "team_ids": teams[:2].ids,
+                "time_scheduled_start": start,
+                "time_scheduled_end": start + timedelta(hours=1),
+            }
+        )
+        other_match = self.match_model.create(
+            {
+                "tournament_id": tournament.id,
+                "court_id": court.id,
+                "team_ids": teams[2:4].ids,
+                "time_scheduled_start": start + timedelta(hours=2),
+                "time_scheduled_end": start + timedelta(hours=3),
+            }
+        )
+
+        with self.assertRaises(ValidationError) as ve:
+            other_match.write(
+                {
+                    "time_scheduled_start": start + timedelta(minutes=30),
+                    "time_scheduled_end": start + timedelta(hours=2),
+                }
+            )
+        exc_message = ve.exception.args[0]
+        self.assertIn("is overlapping", exc_message)
+        self.assertIn(match.display_name, exc_message)
+
+    def test_court_exclusion_constraint_swap(self):
+        """
+        Prevent courts double-booking in the database
+        and swap two matches of the same court,
+        check that the matches are swapped.
+        """
+        self.env["ir.config_parameter"].sudo().set_param(
+            COURT_EXCLUSION_PARAMETER, True
+        )
+        self.match_model.update_court_exclusion_constraint()
+        tournament = first(self.tournaments)
+        court = first(tournament.court_ids)
+        teams = tournament.team_ids
+        start = fields.Datetime.now()
+        end = start + timedelta(hours=1)
+        other_end = end + timedelta(hours=1)
+        match = self.match_model.create(
+            {
+                "tournament_id": tournament.id,
+                "court_id": court.id,
+                "team_ids": teams[:2].ids,
+                "time_scheduled_start": start,
+                "time_scheduled_end": end,
+            }
+        )
+        other_match = self.match_model.create(
+            {
+                "tournament_id": tournament.id,
+                "court_id": court.id,
+                "team_ids": teams[2:4].ids,
+                "time_scheduled_start": end,
+                "time_scheduled_end": other_end,
+            }
+        )
+
+        self.match_model.write_schedule(
+            [
+                (match, court.id, end, other_end),
+                (other_match, court.id, start, end),
+            ]
+        )
+        self.assertEqual(match.time_scheduled_start, end)
+        self.assertEqual(other_match.time_scheduled_start, start)
+
+    def test_component_slots(self):
+        """
+        Create and reschedule a match,
+        check that the slots of its components follow the match.
+        """
+        tournament = first(self.tournaments)
+        court = first(tournament.court_ids)
+        start = fields.Datetime.now()
+        match = self.match_model.create(
+            {
+                "tournament_id": tournament.id,
+                "court_id": court.id,
+                "team_ids": tournament.team_ids[:2].ids,
+                "time_scheduled_start": start,
+                "time_scheduled_end": start + timedelta(hours=1),
+            }
+        )
+        components = match.component_ids
+        slots = match.component_slot_ids
+        self.assertEqual(slots.component_id, components)
+        self.assertEqual(set(slots.mapped("time_start")), {start})
+        self.assertEqual(first(components).tournament_slot_ids.match_id, match)
+
+        new_start = start + timedelta(hours=2)
+        match.update(
+            {
+                "time_scheduled_start": new_start,
+                "time_scheduled_end": new_start + timedelta(hours=1),
+            }
+        )
+        self.assertEqual(
+            set(match.component_slot_ids.mapped("time_start")), {new_start}
+        )
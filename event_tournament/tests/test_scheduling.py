@@ -0,0 +1,304 @@
+#  Copyright 2023 Simone Rubino <daemo00@gmail.com>
+#  License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+import time
+from datetime import datetime, timedelta
+
+from odoo.tests import BaseCase
+
+from ..tools import scheduling
+
+
+class TestScheduling(BaseCase):
+    def get_tight_scheduler(self):
+        """
+        Scheduler for 9 matches between 6 teams on 3 courts in 3 time slots,
+        with an order of matches that does not fit greedily.
+        """
+        courts = [scheduling.CourtSpec(id=court_id) for court_id in (1, 2, 3)]
+        scheduler = scheduling.Scheduler(courts)
+        tournament = scheduling.TournamentSpec(
+            id=1,
+            court_ids=(1, 2, 3),
+            duration=timedelta(hours=1),
+            min_start=datetime(2023, 1, 1),
+            max_start=datetime(2023, 1, 1, 2),
+        )
+        matches_teams = [
+            (0, 1),
+            (2, 4),
+            (3, 5),
+            (0, 2),
+            (1, 5),
+            (0, 3),
+            (1, 4),
+            (2, 3),
+            (4, 5),
+        ]
+        return scheduler, tournament, matches_teams
+
+    def test_place_greedy(self):
+        """
+        Place matches without a deadline,
+        check that a match does not fit.
+        """
+        scheduler, tournament, matches_teams = self.get_tight_scheduler()
+        placements = [
+            scheduler.place(tournament, match_teams, frozenset(match_teams))
+            for match_teams in matches_teams
+        ]
+        self.assertIn(None, placements)
+
+    def test_place_repair(self):
+        """
+        Place matches with a deadline,
+        check that placed matches are moved to make room for all of them.
+        """
+        scheduler, tournament, matches_teams = self.get_tight_scheduler()
+        deadline = time.monotonic() + 10
+        placements = [
+            scheduler.place(
+                tournament, match_teams, frozenset(match_teams), deadline=deadline
+            )
+            for match_teams in matches_teams
+        ]
+        self.assertNotIn(None, placements)
+        for placement in placements:
+            for other_placement in placements:
+                if placement is other_placement:
+                    continue
+                if placement.start != other_placement.start:
+                    continue
+                self.assertNotEqual(placement.court_id, other_placement.court_id)
+                self.assertFalse(
+                    placement.component_ids & other_placement.component_ids
+                )
+
+    def test_independent_groups(self):
+        """
+        Split items using shared resources,
+        check that items are grouped by transitively shared resources.
+        """
+        groups = scheduling.independent_groups(
+            {
+                1: {"court 1"},
+                2: {"court 2", "component 1"},
+                3: {"court 1", "component 2"},
+                4: {"component 1"},
+                5: set(),
+            }
+        )
+        self.assertEqual(
+            sorted(sorted(group) for group in groups), [[1, 3], [2, 4], [5]]
+        )
+
+    def test_place_off_grid(self):
+        """
+        Place matches on a court available after the tournament start,
+        check that they start when the court is available
+        and not at the following multiple of the match duration.
+        """
+        court = scheduling.CourtSpec(id=1, available_start=datetime(2023, 1, 1, 9, 20))
+        scheduler = scheduling.Scheduler([court])
+        tournament = scheduling.TournamentSpec(
+            id=1,
+            court_ids=(1,),
+            duration=timedelta(hours=1),
+            min_start=datetime(2023, 1, 1, 9),
+            max_start=datetime(2023, 1, 1, 20),
+        )
+        first_placement = scheduler.place(tournament, (1, 2), frozenset((1, 2)))
+        second_placement = scheduler.place(tournament, (3, 4), frozenset((3, 4)))
+        self.assertEqual(first_placement.start, datetime(2023, 1, 1, 9, 20))
+        self.assertEqual(second_placement.start, datetime(2023, 1, 1, 10, 20))
+
+        scheduler.remove_placement(first_placement)
+        third_placement = scheduler.place(tournament, (5, 6), frozenset((5, 6)))
+        self.assertEqual(third_placement.start, datetime(2023, 1, 1, 9, 20))
+
+    def test_place_windows(self):
+        """
+        Place matches on a court closed for lunch
+        with a component arriving late,
+        check that matches are only placed when both are available.
+        """
+        court = scheduling.CourtSpec(
+            id=1,
+            windows=(
+                (datetime(2023, 1, 1, 9), datetime(2023, 1, 1, 12)),
+                (datetime(2023, 1, 1, 13), datetime(2023, 1, 1, 18)),
+            ),
+        )
+        scheduler = scheduling.Scheduler([court])
+        scheduler.set_component_windows(1, [(datetime(2023, 1, 1, 11), None)])
+        tournament = scheduling.TournamentSpec(
+            id=1,
+            court_ids=(1,),
+            duration=timedelta(hours=1),
+            min_start=datetime(2023, 1, 1, 9),
+            max_start=datetime(2023, 1, 1, 20),
+        )
+        starts = [
+            scheduler.place(tournament, match_teams, frozenset(match_teams)).start
+            for match_teams in [(1, 2), (3, 4), (5, 6), (7, 8)]
+        ]
+        self.assertEqual(
+            starts,
+            [
+                datetime(2023, 1, 1, 11),
+                datetime(2023, 1, 1, 9),
+                datetime(2023, 1, 1, 10),
+                datetime(2023, 1, 1, 13),
+            ],
+        )
+
+    def test_get_metrics(self):
+        """
+        Compute metrics of a schedule with a component playing twice in a row,
+        check makespan, court usage, waits and back to back matches.
+        """
+        start = datetime(2023, 1, 1, 9)
+        hour = timedelta(hours=1)
+        placements = [
+            scheduling.Placement(1, (1, 2), 1, start, start + hour, frozenset({1, 2})),
+            scheduling.Placement(
+                1, (1, 3), 1, start + hour, start + 2 * hour, frozenset({1, 3})
+            ),
+            scheduling.Placement(
+                1, (2, 3), 2, start + 3 * hour, start + 4 * hour, frozenset({2, 3})
+            ),
+        ]
+        metrics = scheduling.get_metrics(placements)
+        self.assertEqual(metrics["matches_nbr"], 3)
+        self.assertEqual(metrics["time_end"], start + 4 * hour)
+        self.assertEqual(metrics["makespan"], 4)
+        self.assertEqual(metrics["court_usage"], 3 / 8)
+        self.assertEqual(metrics["idle_average"], 1)
+        self.assertEqual(metrics["idle_max"], 2)
+        self.assertEqual(metrics["back_to_back_nbr"], 1)
+
+    def test_solve_cached(self):
+        """
+        Solve the same problem twice,
+        check that the second solution comes from the cache
+        with the payloads of the second problem,
+        that problems without inputs are not cached
+        and that a solution with other teams is not reused.
+        """
+        court = scheduling.CourtSpec(id=1)
+        tournament = scheduling.TournamentSpec(
+            id=1,
+            court_ids=(1,),
+            duration=timedelta(hours=1),
+            min_start=datetime(2023, 1, 1, 9),
+            max_start=datetime(2023, 1, 1, 20),
+        )
+
+        def get_problem(
+            payload, inputs=("teams", (1, 2, 3, 4)), matches_teams=((1, 2), (3, 4))
+        ):
+            return scheduling.SchedulingProblem(
+                courts=[court],
+                tournaments={tournament.id: tournament},
+                candidates=(
+                    ((teams, payload), frozenset(teams), 0, tournament.id)
+                    for teams in matches_teams
+                ),
+                inputs=inputs,
+            )
+
+        ((placements, unplaced),) = scheduling.solve_cached([get_problem("first")])
+        self.assertIsNone(unplaced)
+
+        def map_function(function, problems):
+            self.assertFalse(problems)
+            return []
+
+        ((cached_placements, unplaced),) = scheduling.solve_cached(
+            [get_problem("second")], map_function=map_function
+        )
+        self.assertIsNone(unplaced)
+        self.assertEqual(
+            [placement for _payload, placement in cached_placements],
+            [placement for _payload, placement in placements],
+        )
+        self.assertEqual(
+            [payload for payload, _placement in cached_placements],
+            ["second", "second"],
+        )
+
+        solved_problems = []
+
+        def map_function(function, problems):
+            solved_problems.extend(problems)
+            return [function(problem) for problem in problems]
+
+        scheduling.solve_cached(
+            [get_problem("third", inputs=None)], map_function=map_function
+        )
+        self.assertEqual(len(solved_problems), 1)
+
+        ((other_placements, unplaced),) = scheduling.solve_cached(
+            [get_problem("fourth", matches_teams=((1, 3), (2, 4)))],
+            map_function=map_function,
+        )
+        self.assertEqual(len(solved_problems), 2)
+        self.assertEqual(
+            [placement.team_ids for _payload, placement in other_placements],
+            [(1, 3), (2, 4)],
+        )
+
+    def test_diff_schedules(self):
+        """
+        Diff two schedules with a rematch,
+        check that matches are paired by key and in order.
+        """
+        schedule = [("a", 1), ("b", 1), ("a", 2), ("c", 1)]
+        other_schedule = [("a", 1), ("b", 2), ("a", 3), ("d", 1)]
+        removed, added, moved = scheduling.diff_schedules(
+            schedule, other_schedule, lambda entry: entry[0]
+        )
+        self.assertEqual(removed, [3])
+        self.assertEqual(added, [3])
+        self.assertEqual(moved, [(1, 1), (2, 2)])
+
+    def test_busiest_component_matches_nbr(self):
+        """
+        Count the matches of components shared by several teams,
+        check that the busiest component plays the matches of all its teams.
+        """
+        # Component 1 plays in teams 0 and 1, that can't play each other
+        teams_components = [(1, 2), (1, 3), (4, 5), (6, 7)]
+        self.assertEqual(
+            scheduling.busiest_component_matches_nbr(teams_components, 2), 4
+        )
+
+    def test_schedule_bounds_off_grid(self):
+        """
+        Compute the bounds of matches on a court opening off the grid,
+        check that they count the matches that can be placed there.
+        """
+        court = scheduling.CourtSpec(
+            id=1,
+            windows=((datetime(2023, 1, 1, 9, 30), datetime(2023, 1, 1, 11, 30)),),
+        )
+        tournament = scheduling.TournamentSpec(
+            id=1,
+            court_ids=(1,),
+            duration=timedelta(hours=1),
+            min_start=datetime(2023, 1, 1, 9),
+            max_start=datetime(2023, 1, 1, 11),
+        )
+        bounds = scheduling.schedule_bounds(tournament, [court], 2)
+        self.assertTrue(bounds.feasible)
+        self.assertEqual(bounds.slots_nbr, 2)
+        self.assertEqual(bounds.courts_end, datetime(2023, 1, 1, 11, 30))
+
+        scheduler = scheduling.Scheduler([court])
+        starts = [
+            scheduler.place(tournament, match_teams, frozenset(match_teams)).start
+            for match_teams in [(1, 2), (3, 4)]
+        ]
+        self.assertEqual(
+            starts, [datetime(2023, 1, 1, 9, 30), datetime(2023, 1, 1, 10, 30)]
+        )
@@ -0,0 +1,1656 @@
+#  Copyright 2023 Simone Rubino <daemo00@gmail.com>
+#  License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""
+Scheduling of tournament matches on plain Python data.
+
+Nothing in this module touches the database:
+the tournament loads courts, teams and existing matches once,
+the scheduler computes the whole plan in memory
+and the tournament creates the resulting matches in one batch.
+"""
+import bisect
+import dataclasses
+import hashlib
+import heapq
+import itertools
+import math
+import random
+import time
+from collections import Counter, OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+
+def overlaps(start, end, other_start, other_end):
+    """
+    Whether ``[start, end)`` overlaps ``[other_start, other_end)``.
+
+    A missing (None) bound is open: the interval extends indefinitely.
+    """
+    return (end is None or other_start is None or other_start < end) and (
+        start is None or other_end is None or other_end > start
+    )
+
+
+class IntervalIndex:
+    """
+    Busy intervals sorted by start.
+
+    Intervals are half-open (``[start, end)``),
+    so a match ending at 10:00 does not overlap a match starting at 10:00.
+    Intervals with a missing bound are kept apart and always checked.
+    """
+
+    def __init__(self):
+        self.starts = []
+        self.intervals = []
+        self.unbounded = []
+        self.max_length = timedelta()
+
+    def __len__(self):
+        return len(self.intervals) + len(self.unbounded)
+
+    def __iter__(self):
+        yield from self.intervals
+        yield from self.unbounded
+
+    def add(self, start, end, key=None):
+        interval = (start, end, key)
+        if start is None or end is None:
+            self.unbounded.append(interval)
+            return
+        index = bisect.bisect_right(self.starts, start)
+        self.starts.insert(index, start)
+        self.intervals.insert(index, interval)
+        self.max_length = max(self.max_length, end - start)
+
+    def remove(self, start, end, key):
+        """Remove the interval added with `key`, compared by identity."""
+        if start is None or end is None:
+            intervals = self.unbounded
+            low, high = 0, len(intervals)
+        else:
+            intervals = self.intervals
+            low = bisect.bisect_left(self.starts, start)
+            high = bisect.bisect_right(self.starts, start)
+        for index in range(low, high):
+            if intervals[index][2] is key:
+                del intervals[index]
+                if intervals is self.intervals:
+                    del self.starts[index]
+                return
+
+    def overlapping(self, start, end):
+        """Intervals overlapping ``[start, end)``."""
+        if start is None or end is None:
+            candidates = self.intervals
+        else:
+            # An interval overlapping [start, end) starts before `end`
+            # and no sooner than `start - max_length`
+            low = bisect.bisect_right(self.starts, start - self.max_length)
+            high = bisect.bisect_left(self.starts, end)
+            candidates = self.intervals[low:high]
+        return [
+            interval
+            for interval in itertools.chain(candidates, self.unbounded)
+            if overlaps(start, end, interval[0], interval[1])
+        ]
+
+    def is_free(self, start, end):
+        return not self.overlapping(start, end)
+
+
+class FreeIntervals:
+    """
+    Disjoint free intervals sorted by start,
+    within the availability windows they are created with.
+
+    Missing bounds are open: they are stored as
+    :attr:`datetime.min` and :attr:`datetime.max`.
+    """
+
+    def __init__(self, windows=((None, None),)):
+        self.windows = sorted(
+            (start or datetime.min, end or datetime.max) for start, end in windows
+        )
+        self.starts = []
+        self.ends = []
+        for start, end in self.windows:
+            self.release(start, end)
+
+    def reserve(self, start, end):
+        """Remove ``[start, end)`` from the free intervals."""
+        start = start or datetime.min
+        end = end or datetime.max
+        # First free interval ending after `start`
+        first = bisect.bisect_right(self.ends, start)
+        last = first
+        starts, ends = [], []
+        while last < len(self.starts) and self.starts[last] < end:
+            if self.starts[last] < start:
+                starts.append(self.starts[last])
+                ends.append(start)
+            if self.ends[last] > end:
+                starts.append(end)
+                ends.append(self.ends[last])
+            last += 1
+        self.starts[first:last] = starts
+        self.ends[first:last] = ends
+
+    def release(self, start, end):
+        """Add back ``[start, end)`` to the free intervals, within the windows."""
+        start = start or datetime.min
+        end = end or datetime.max
+        for window_start, window_end in self.windows:
+            free_start = max(start, window_start)
+            free_end = min(end, window_end)
+            if free_start >= free_end:
+                continue
+            # Merge with the free intervals touching it
+            first = bisect.bisect_left(self.ends, free_start)
+            last = first
+            while last < len(self.starts) and self.starts[last] <= free_end:
+                free_start = min(free_start, self.starts[last])
+                free_end = max(free_end, self.ends[last])
+                last += 1
+            self.starts[first:last] = [free_start]
+            self.ends[first:last] = [free_end]
+
+    def get_next_start(self, start, duration):
+        """
+        Earliest start, not before `start`,
+        of a `duration` long free interval; None if there is none.
+        """
+        # First free interval ending after `start`
+        index = bisect.bisect_right(self.ends, start)
+        while index < len(self.starts):
+            next_start = max(start, self.starts[index])
+            if next_start <= self.ends[index] - duration:
+                return next_start
+            index += 1
+        return None
+
+
+def compatible_tuples(teams_components, size):
+    """
+    Tuples of `size` teams where no component plays in two teams.
+
+    Components of each team are encoded once as a bitset,
+    so that checking whether two teams share a component
+    is a single integer operation.
+
+    :param teams_components: a sequence of components IDs for each team.
+    :return: a generator of tuples of team indexes,
+        in the same order as `itertools.combinations`.
+    """
+    if size < 1:
+        return
+    components_bits = {}
+    teams_bits = []
+    for components_ids in teams_components:
+        team_bits = 0
+        for component_id in components_ids:
+            component_bit = components_bits.setdefault(
+                component_id, len(components_bits)
+            )
+            team_bits |= 1 << component_bit
+        teams_bits.append(team_bits)
+
+    # Bitset of the following teams that have no common component with each team
+    compatible_teams = []
+    for index, team_bits in enumerate(teams_bits):
+        compatible_bits = 0
+        for other_index in range(index + 1, len(teams_bits)):
+            if not team_bits & teams_bits[other_index]:
+                compatible_bits |= 1 << other_index
+        compatible_teams.append(compatible_bits)
+
+    def extend(match_teams, candidates):
+        if len(match_teams) == size:
+            yield tuple(match_teams)
+            return
+        missing_teams_nbr = size - len(match_teams)
+        while candidates.bit_count() >= missing_teams_nbr:
+            lowest_candidate = candidates & -candidates
+            candidates ^= lowest_candidate
+            index = lowest_candidate.bit_length() - 1
+            yield from extend(
+                match_teams + [index], candidates & compatible_teams[index]
+            )
+
+    yield from extend([], (1 << len(teams_bits)) - 1)
+
+
+def busiest_component_matches_nbr(teams_components, size):
+    """
+    Matches played by the busiest component
+    in the tuples of :func:`compatible_tuples`.
+
+    A component never plays in two teams of the same match,
+    so its matches are the matches of its teams.
+    """
+    teams_matches = Counter()
+    for match_teams in compatible_tuples(teams_components, size):
+        teams_matches.update(match_teams)
+    components_matches = Counter()
+    for index, components_ids in enumerate(teams_components):
+        for component_id in components_ids:
+            components_matches[component_id] += teams_matches[index]
+    return max(components_matches.values(), default=0)
+
+
+def circle_rounds(teams_nbr):
+    """
+    Rounds of a round robin between `teams_nbr` teams, using the circle method.
+
+    The first team stays still while the others rotate around it,
+    so that each team meets every other team exactly once
+    and plays at most once per round.
+    With an odd number of teams, one team rests (has a bye) in each round.
+
+    :return: a list of rounds, each round is a list of pairs of team indexes.
+    """
+    teams = list(range(teams_nbr))
+    if len(teams) % 2:
+        # The team paired with the bye rests
+        teams.append(None)
+    rounds = []
+    half = len(teams) // 2
+    for _round_index in range(len(teams) - 1):
+        round_pairs = ((teams[index], teams[-index - 1]) for index in range(half))
+        rounds.append([pair for pair in round_pairs if None not in pair])
+        teams.insert(1, teams.pop())
+    return rounds
+
+
+SWISS_MAX_STEPS = 100000
+
+
+def swiss_pairs(ranking, played, byes=None, max_steps=SWISS_MAX_STEPS):
+    """
+    Pairs of the next round of a Swiss-system tournament.
+
+    Each team is paired with the best ranked team following it
+    that it has not played yet;
+    when that leads to a dead end, the previous pairs are revised.
+    With an odd number of teams,
+    the worst ranked team among those that had the fewest byes rests.
+
+    :param ranking: teams keys, from the best ranked.
+    :param played: frozensets of the pairs of teams that already played.
+    :param byes: mapping from team key to the byes it already had.
+    :param max_steps: pairs tried before giving up.
+    :return: a (pairs, resting team) tuple, with None pairs
+        if no pairing without rematches has been found.
+    """
+    teams = list(ranking)
+    bye = None
+    if len(teams) % 2:
+        byes = byes or {}
+        bye = min(reversed(teams), key=lambda team: byes.get(team, 0))
+        teams.remove(bye)
+
+    steps = 0
+
+    def pair(unpaired):
+        nonlocal steps
+        if not unpaired:
+            return []
+        team = unpaired[0]
+        for index in range(1, len(unpaired)):
+            steps += 1
+            if steps > max_steps:
+                return None
+            opponent = unpaired[index]
+            if frozenset((team, opponent)) in played:
+                continue
+            pairs = pair(unpaired[1:index] + unpaired[index + 1 :])
+            if pairs is not None:
+                pairs.append((team, opponent))
+                return pairs
+        return None
+
+    pairs = pair(teams)
+    if pairs is not None:
+        pairs.reverse()
+    return pairs, bye
+
+
+def bracket_order(size):
+    """
+    Seeds of a knockout bracket of `size` (a power of 2), in bracket order.
+
+    Consecutive seeds play each other in the first round
+    and the best seeds can only meet in the latest rounds.
+    """
+    order = [0]
+    while len(order) < size:
+        last_seed = 2 * len(order) - 1
+        order = [seed for top in order for seed in (top, last_seed - top)]
+    return order
+
+
+BYE = "bye"
+
+
+class Bracket:
+    """
+    Single or double elimination bracket.
+
+    Matches are identified by slots: (bracket, round number, position) tuples
+    where bracket is "winners", "losers" or "final".
+    A participant of a slot is a team key,
+    :data:`BYE` if nobody will ever fill it
+    or None if it depends on a slot that has not been played yet.
+    A team facing a bye advances without playing.
+    """
+
+    def __init__(self, seeds, double=False, results=None):
+        """
+        :param seeds: teams keys, from the best seed.
+        :param double: whether losers of the winners bracket get a second chance.
+        :param results: mapping from played slots to (winner, loser) tuples.
+        """
+        self.seeds = list(seeds)
+        self.double = double
+        self.results = results or {}
+        self.rounds_nbr = (len(self.seeds) - 1).bit_length()
+        self.size = 1 << self.rounds_nbr
+        self.order = bracket_order(self.size)
+        self.outcomes = {}
+
+    def slots(self):
+        if len(self.seeds) < 2:
+            return
+        for round_number in range(1, self.rounds_nbr + 1):
+            for position in range(self.size >> round_number):
+                yield "winners", round_number, position
+        if not self.double:
+            return
+        for round_number in range(1, 2 * (self.rounds_nbr - 1) + 1):
+            for position in range(self.size >> ((round_number + 1) // 2 + 1)):
+                yield "losers", round_number, position
+        yield "final", 1, 0
+
+    def get_seed(self, index):
+        return self.seeds[index] if index < len(self.seeds) else BYE
+
+    def participants(self, slot):
+        bracket, round_number, position = slot
+        if bracket == "winners":
+            if round_number == 1:
+                return (
+                    self.get_seed(self.order[2 * position]),
+                    self.get_seed(self.order[2 * position + 1]),
+                )
+            previous_slot = ("winners", round_number - 1)
+            return (
+                self.winner(previous_slot + (2 * position,)),
+                self.winner(previous_slot + (2 * position + 1,)),
+            )
+        if bracket == "losers":
+            if round_number == 1:
+                return (
+                    self.loser(("winners", 1, 2 * position)),
+                    self.loser(("winners", 1, 2 * position + 1)),
+                )
+            previous_slot = ("losers", round_number - 1)
+            if round_number % 2:
+                return (
+                    self.winner(previous_slot + (2 * position,)),
+                    self.winner(previous_slot + (2 * position + 1,)),
+                )
+            # Losers coming from the winners bracket
+            # are crossed to avoid meeting the same teams again
+            winners_round = round_number // 2 + 1
+            positions_nbr = self.size >> winners_round
+            return (
+                self.winner(previous_slot + (position,)),
+                self.loser(("winners", winners_round, positions_nbr - 1 - position)),
+            )
+        if self.rounds_nbr == 1:
+            losers_winner = self.loser(("winners", 1, 0))
+        else:
+            losers_winner = self.winner(("losers", 2 * (self.rounds_nbr - 1), 0))
+        return self.winner(("winners", self.rounds_nbr, 0)), losers_winner
+
+    def outcome(self, slot):
+        """(winner, loser) of `slot` or None if it has not been decided yet."""
+        if slot in self.outcomes:
+            return self.outcomes[slot]
+        participant, other_participant = self.participants(slot)
+        if participant is None or other_participant is None:
+            outcome = None
+        elif other_participant == BYE:
+            outcome = participant, BYE
+        elif participant == BYE:
+            outcome = other_participant, BYE
+        else:
+            outcome = self.results.get(slot)
+        self.outcomes[slot] = outcome
+        return outcome
+
+    def winner(self, slot):
+        outcome = self.outcome(slot)
+        return outcome and outcome[0]
+
+    def loser(self, slot):
+        outcome = self.outcome(slot)
+        return outcome and outcome[1]
+
+    def playable(self):
+        """
+        Slots whose participants are known teams and that have not been played.
+
+        :return: a dictionary mapping each slot to its pair of teams keys.
+        """
+        playable = {}
+        for slot in self.slots():
+            if slot in self.results:
+                continue
+            participants = self.participants(slot)
+            if None in participants or BYE in participants:
+                continue
+            playable[slot] = participants
+        return playable
+
+
+FRONTIER_SIZE = 1000
+
+
+class MatchFrontier:
+    """
+    Bounded priority queue over a stream of candidate matches.
+
+    Candidates are (key, components IDs, round number, group) tuples,
+    at most `size` of them are held in memory at any time.
+
+    The next candidate is the one in the group
+    that had the fewest candidates popped with respect to its weight,
+    then in the lowest round,
+    then whose components have rested the most,
+    according to `last_played`: a mapping from component ID
+    to the end of the last match it played.
+    Ties are broken by the order of the stream,
+    or randomly if `rng` is provided.
+    """
+
+    def __init__(
+        self, candidates, last_played, size=FRONTIER_SIZE, rng=None, weights=None
+    ):
+        """
+        :param weights: mapping from group to its weight,
+            groups are not weighted if missing.
+        """
+        self.candidates = iter(candidates)
+        self.last_played = last_played
+        self.size = size
+        self.rng = rng
+        self.weights = weights
+        self.popped_counts = Counter()
+        self.heap = []
+        self.sequence = itertools.count()
+        self.fill()
+
+    def __bool__(self):
+        return bool(self.heap)
+
+    def __len__(self):
+        return len(self.heap)
+
+    def get_priority(self, candidate):
+        """
+        Weighted share of the group of a candidate, its round
+        and when its most recently playing component played.
+        """
+        _key, components_ids, round_number, group = candidate
+        share = 0
+        if self.weights:
+            share = self.popped_counts[group] / self.weights.get(group, 1)
+        last_played = max(
+            (
+                self.last_played.get(component_id, datetime.min)
+                for component_id in components_ids
+            ),
+            default=datetime.min,
+        )
+        return share, round_number, last_played
+
+    def fill(self):
+        missing_nbr = self.size - len(self.heap)
+        for candidate in itertools.islice(self.candidates, missing_nbr):
+            tie_breaker = self.rng.random() if self.rng else next(self.sequence)
+            priority = self.get_priority(candidate)
+            heapq.heappush(self.heap, (priority, tie_breaker, candidate))
+
+    def pop(self):
+        """Next candidate, see :class:`MatchFrontier` for the priority."""
+        while True:
+            priority, tie_breaker, candidate = heapq.heappop(self.heap)
+            # Priorities only grow as groups and components play,
+            # so if this one is still current it is the lowest
+            current_priority = self.get_priority(candidate)
+            if current_priority == priority:
+                break
+            heapq.heappush(self.heap, (current_priority, tie_breaker, candidate))
+        self.popped_counts[candidate[3]] += 1
+        self.fill()
+        return candidate
+
+
+def get_gaps(windows):
+    """
+    Intervals outside of `windows`, a missing (None) bound is open.
+
+    :param windows: (start, end) tuples, a missing (None) bound is open.
+    """
+    gaps = []
+    gap_start = None
+    for start, end in sorted(windows, key=lambda w: w[0] or datetime.min):
+        if start is not None and (gap_start is None or gap_start < start):
+            gaps.append((gap_start, start))
+        if end is None:
+            return gaps
+        gap_start = end if gap_start is None else max(gap_start, end)
+    gaps.append((gap_start, None))
+    return gaps
+
+
+@dataclass
+class CourtSpec:
+    """
+    When a court can be used: within its availability windows,
+    or between `available_start` and `available_end` if they are missing.
+    """
+
+    id: int
+    available_start: datetime = None
+    available_end: datetime = None
+    windows: tuple = None
+
+    def __post_init__(self):
+        if self.windows is None:
+            self.windows = ((self.available_start, self.available_end),)
+        self.windows = tuple(
+            sorted(self.windows, key=lambda window: window[0] or datetime.min)
+        )
+
+    def is_available(self, start, end):
+        return any(
+            (window_start is None or window_start <= start)
+            and (window_end is None or end <= window_end)
+            for window_start, window_end in self.windows
+        )
+
+    def get_next_start(self, start, duration):
+        """
+        Earliest start, not before `start`,
+        of a `duration` long use of the court; None if there is none.
+        """
+        for window_start, window_end in self.windows:
+            next_start = max(start, window_start or start)
+            if window_end is None or next_start + duration <= window_end:
+                return next_start
+        return None
+
+
+@dataclass
+class TournamentSpec:
+    id: int
+    court_ids: tuple
+    duration: timedelta
+    min_start: datetime
+    max_start: datetime
+    min_rest: timedelta = timedelta()
+
+
+@dataclass
+class ScheduleBounds:
+    """
+    Lower bounds of a schedule, computed without placing any match.
+
+    An end is None when matches can't fit in the available time.
+    """
+
+    matches_nbr: int
+    slots_nbr: int
+    busiest_matches_nbr: int
+    courts_end: datetime = None
+    components_end: datetime = None
+
+    @property
+    def feasible(self):
+        return self.courts_end is not None and self.components_end is not None
+
+    @property
+    def min_end(self):
+        """Earliest time the last match can end, None if infeasible."""
+        if not self.feasible:
+            return None
+        return max(self.courts_end, self.components_end)
+
+
+def get_court_spans(tournament, court):
+    """
+    Parts of the availability windows of `court`
+    where matches of `tournament` can be played.
+
+    :return: a list of (start, end) tuples,
+        each one long enough for at least a match.
+    """
+    duration = tournament.duration
+    last_end = tournament.max_start + duration
+    spans = []
+    for window_start, window_end in court.windows:
+        span_start = max(window_start or tournament.min_start, tournament.min_start)
+        span_end = min(window_end or last_end, last_end)
+        if span_end - span_start >= duration:
+            spans.append((span_start, span_end))
+    return spans
+
+
+def schedule_bounds(tournament, courts, matches_nbr, busiest_matches_nbr=0):
+    """
+    Lower bounds of the schedule of `matches_nbr` matches of `tournament`.
+
+    Matches can start at any time,
+    so a court window fits as many matches as their durations.
+
+    :param courts: :class:`CourtSpec` of the courts of the tournament.
+    :param busiest_matches_nbr: matches played by the busiest component,
+        they are played one after the other with the minimum rest in between.
+    :return: a :class:`ScheduleBounds`.
+    """
+    duration = tournament.duration
+    courts_spans = [
+        (span_start, (span_end - span_start) // duration)
+        for court in courts
+        for span_start, span_end in get_court_spans(tournament, court)
+    ]
+    bounds = ScheduleBounds(
+        matches_nbr=matches_nbr,
+        slots_nbr=sum(slots_nbr for _span_start, slots_nbr in courts_spans),
+        busiest_matches_nbr=busiest_matches_nbr,
+    )
+
+    # Fill the earliest court slots
+    if not matches_nbr:
+        bounds.courts_end = tournament.min_start
+    elif matches_nbr <= bounds.slots_nbr:
+        slots_ends = heapq.merge(
+            *(
+                (span_start + duration * (index + 1) for index in range(slots_nbr))
+                for span_start, slots_nbr in courts_spans
+            )
+        )
+        bounds.courts_end = next(itertools.islice(slots_ends, matches_nbr - 1, None))
+
+    # Play the matches of the busiest component back to back
+    if busiest_matches_nbr <= 1:
+        bounds.components_end = tournament.min_start + duration * busiest_matches_nbr
+    else:
+        last_start = tournament.min_start + (busiest_matches_nbr - 1) * (
+            duration + tournament.min_rest
+        )
+        if last_start <= tournament.max_start:
+            bounds.components_end = last_start + duration
+    return bounds
+
+
+@dataclass(eq=False)
+class Placement:
+    tournament_id: int
+    team_ids: tuple
+    court_id: int
+    start: datetime
+    end: datetime
+    component_ids: frozenset = field(default_factory=frozenset)
+    tournament: TournamentSpec = None
+
+
+REPAIR_DEPTH = 3
+
+
+class Scheduler:
+    """
+    Court occupancy and component busy indexes for a set of courts.
+
+    Existing matches are loaded with :meth:`add_busy`,
+    new matches are placed with :meth:`place`.
+    """
+
+    def __init__(self, courts):
+        self.courts = {court.id: court for court in courts}
+        self.court_busy = defaultdict(IntervalIndex)
+        self.court_free = {court.id: FreeIntervals(court.windows) for court in courts}
+        self.component_busy = defaultdict(IntervalIndex)
+        # When components can't play, regardless of their rest
+        self.component_unavailable = defaultdict(IntervalIndex)
+        # End of the last match played by each component
+        self.last_played = {}
+        # Placements added and removed while repairing, to be rolled back
+        self.journal = None
+
+    def add_busy(self, court_id, component_ids, start, end, key=None):
+        if court_id:
+            self.court_busy[court_id].add(start, end, key)
+            if court_id in self.court_free:
+                self.court_free[court_id].reserve(start, end)
+        for component_id in component_ids:
+            self.component_busy[component_id].add(start, end, key)
+            last_played = self.last_played.get(component_id)
+            if end and (last_played is None or last_played < end):
+                self.last_played[component_id] = end
+
+    def remove_busy(self, court_id, component_ids, start, end, key):
+        if court_id:
+            self.court_busy[court_id].remove(start, end, key)
+            if court_id in self.court_free:
+                self.release_court(court_id, start, end)
+        for component_id in component_ids:
+            component_busy = self.component_busy[component_id]
+            component_busy.remove(start, end, key)
+            if self.last_played.get(component_id) == end:
+                last_played = max(
+                    (interval[1] for interval in component_busy if interval[1]),
+                    default=None,
+                )
+                if last_played is None:
+                    del self.last_played[component_id]
+                else:
+                    self.last_played[component_id] = last_played
+
+    def set_component_windows(self, component_id, windows):
+        """Make `component_id` unavailable outside of `windows`."""
+        unavailable = self.component_unavailable[component_id]
+        for start, end in get_gaps(windows):
+            unavailable.add(start, end)
+
+    def is_component_available(self, component_id, start, end):
+        return self.component_unavailable[component_id].is_free(start, end)
+
+    def release_court(self, court_id, start, end):
+        """
+        Free the parts of ``[start, end)`` in `court_id`
+        that are not used by other busy intervals.
+        """
+        free_start = start or datetime.min
+        for interval in sorted(
+            self.court_busy[court_id].overlapping(start, end),
+            key=lambda i: i[0] or datetime.min,
+        ):
+            busy_start = interval[0] or datetime.min
+            if free_start < busy_start:
+                self.court_free[court_id].release(free_start, busy_start)
+            if interval[1] is None:
+                return
+            free_start = max(free_start, interval[1])
+        if end is None or free_start < end:
+            self.court_free[court_id].release(free_start, end)
+
+    def add_placement(self, placement):
+        self.add_busy(
+            placement.court_id,
+            placement.component_ids,
+            placement.start,
+            placement.end,
+            key=placement,
+        )
+        if self.journal is not None:
+            self.journal.append((placement, None))
+
+    def remove_placement(self, placement):
+        self.remove_busy(
+            placement.court_id,
+            placement.component_ids,
+            placement.start,
+            placement.end,
+            placement,
+        )
+        if self.journal is not None:
+            previous_slot = placement.court_id, placement.start, placement.end
+            self.journal.append((placement, previous_slot))
+
+    def rollback(self, journal_length):
+        """Undo the changes journaled after the first `journal_length`."""
+        while len(self.journal) > journal_length:
+            placement, previous_slot = self.journal.pop()
+            if previous_slot is None:
+                self.remove_busy(
+                    placement.court_id,
+                    placement.component_ids,
+                    placement.start,
+                    placement.end,
+                    placement,
+                )
+            else:
+                placement.court_id, placement.start, placement.end = previous_slot
+                self.add_busy(
+                    placement.court_id,
+                    placement.component_ids,
+                    placement.start,
+                    placement.end,
+                    key=placement,
+                )
+
+    def can_place(self, court_id, component_ids, start, end, min_rest=timedelta()):
+        """
+        Whether a match can be played on `court_id` from `start` to `end`.
+
+        Components must rest at least `min_rest` before and after the match.
+        """
+        court = self.courts[court_id]
+        if not court.is_available(start, end):
+            return False
+        if not self.court_busy[court_id].is_free(start, end):
+            return False
+        return all(
+            self.is_component_available(component_id, start, end)
+            and self.component_busy[component_id].is_free(
+                start - min_rest, end + min_rest
+            )
+            for component_id in component_ids
+        )
+
+    def get_blockers(self, court_id, component_ids, start, end, min_rest=timedelta()):
+        """
+        Placements preventing a match to be played on `court_id`
+        from `start` to `end`.
+
+        :return: a set of placements,
+            or None if the match can't be played there even moving them.
+        """
+        court = self.courts[court_id]
+        if not court.is_available(start, end):
+            return None
+        if not all(
+            self.is_component_available(component_id, start, end)
+            for component_id in component_ids
+        ):
+            return None
+        intervals = self.court_busy[court_id].overlapping(start, end)
+        for component_id in component_ids:
+            intervals.extend(
+                self.component_busy[component_id].overlapping(
+                    start - min_rest, end + min_rest
+                )
+            )
+        blockers = {interval[2] for interval in intervals}
+        if not all(isinstance(blocker, Placement) for blocker in blockers):
+            # Existing matches can't be moved
+            return None
+        return blockers
+
+    def iter_starts(self, tournament, court_id):
+        """
+        Starting times of matches of `tournament` on `court_id`:
+        every match duration from the start of each availability window
+        and the end of each busy interval of the court.
+        """
+        court = self.courts[court_id]
+        duration = tournament.duration
+        starts = set()
+        for span_start, span_end in get_court_spans(tournament, court):
+            start = span_start
+            while start + duration <= span_end:
+                starts.add(start)
+                start += duration
+        for _start, end, _key in self.court_busy[court_id]:
+            if end is not None:
+                starts.add(end)
+        return sorted(
+            start
+            for start in starts
+            if tournament.min_start <= start <= tournament.max_start
+            and court.is_available(start, start + duration)
+        )
+
+    def find_slot(self, tournament, component_ids):
+        """
+        Earliest (court, start) for a match of `tournament`,
+        searching the free intervals of each court.
+
+        Among courts free at the same time,
+        the first one in the order of the tournament is used.
+        """
+        slot = None
+        for court_id in tournament.court_ids:
+            start = self.get_next_start(
+                tournament, court_id, component_ids, tournament.min_start
+            )
+            if start is not None and (slot is None or start < slot[1]):
+                slot = court_id, start
+        return slot
+
+    def fit(self, placement):
+        """
+        Move `placement` to its earliest free slot.
+
+        :return: whether a free slot has been found.
+        """
+        slot = self.find_slot(placement.tournament, placement.component_ids)
+        if slot is None:
+            return False
+        placement.court_id, placement.start = slot
+        placement.end = placement.start + placement.tournament.duration
+        self.add_placement(placement)
+        return True
+
+    def repair(self, placement, deadline, depth=REPAIR_DEPTH):
+        """
+        Make room for `placement` by moving the placements in its way,
+        trying first the slots with the fewest placements to move.
+
+        Moved placements are fitted elsewhere, repairing recursively
+        up to `depth` levels; everything is rolled back on failure.
+
+        :param deadline: value of :func:`time.monotonic` to give up at.
+        :return: whether `placement` has been placed.
+        """
+        if depth < 1 or time.monotonic() > deadline:
+            return False
+        tournament = placement.tournament
+        options = []
+        for court_id in tournament.court_ids:
+            for start in self.iter_starts(tournament, court_id):
+                end = start + tournament.duration
+                blockers = self.get_blockers(
+                    court_id, placement.component_ids, start, end, tournament.min_rest
+                )
+                if blockers is not None:
+                    options.append((len(blockers), start, court_id, blockers))
+        options.sort(key=lambda option: option[:2])
+
+        for _blockers_nbr, start, court_id, blockers in options:
+            if time.monotonic() > deadline:
+                return False
+            journal_length = len(self.journal)
+            for blocker in blockers:
+                self.remove_placement(blocker)
+            placement.court_id = court_id
+            placement.start = start
+            placement.end = start + tournament.duration
+            self.add_placement(placement)
+            if all(
+                self.fit(blocker) or self.repair(blocker, deadline, depth - 1)
+                for blocker in sorted(blockers, key=lambda b: b.start)
+            ):
+                return True
+            self.rollback(journal_length)
+        return False
+
+    def get_next_start(
+        self, tournament, court_id, component_ids, start, is_ignored=None
+    ):
+        """
+        Earliest start, not before `start`, of a match of `tournament`
+        on `court_id` when the court and `component_ids` are free.
+
+        :param is_ignored: predicate on the keys of the busy intervals
+            that are not taken into account.
+        :return: the start, or None if the match can't be played there
+            before the last start of `tournament`.
+        """
+        court = self.courts[court_id]
+        duration = tournament.duration
+        min_rest = tournament.min_rest
+        while True:
+            if is_ignored is None:
+                # Jump to the earliest free interval of the court that is long enough
+                start = self.court_free[court_id].get_next_start(start, duration)
+            else:
+                start = court.get_next_start(start, duration)
+            if start is None or start > tournament.max_start:
+                return None
+            end = start + duration
+            next_starts = []
+            if is_ignored is not None:
+                next_starts.extend(
+                    interval[1]
+                    for interval in self.court_busy[court_id].overlapping(start, end)
+                    if not is_ignored(interval[2])
+                )
+            for component_id in component_ids:
+                next_starts.extend(
+                    interval[1]
+                    for interval in self.component_unavailable[
+                        component_id
+                    ].overlapping(start, end)
+                )
+                next_starts.extend(
+                    interval[1] and interval[1] + min_rest
+                    for interval in self.component_busy[component_id].overlapping(
+                        start - min_rest, end + min_rest
+                    )
+                    if not (is_ignored and is_ignored(interval[2]))
+                )
+            if not next_starts:
+                return start
+            if None in next_starts:
+                # Busy indefinitely
+                return None
+            start = max(next_starts)
+
+    def reschedule(self, placements):
+        """
+        Move `placements` to their earliest slot not before their start,
+        pushing later the placements in the way.
+
+        Pushed placements are rescheduled the same way
+        and placements that have been rescheduled are not pushed again:
+        the disruption ripples forward
+        until free time between matches absorbs it.
+        Other courts of the tournament are used if they are free sooner.
+
+        `placements` must not be in the scheduler.
+
+        :return: the list of rescheduled placements,
+            or None if one of them can't fit in its tournament.
+        """
+        sequence = itertools.count()
+        queue = [
+            (placement.start, next(sequence), placement) for placement in placements
+        ]
+        heapq.heapify(queue)
+        rescheduled = []
+        fixed = set()
+
+        def is_pushable(key):
+            return isinstance(key, Placement) and key not in fixed
+
+        while queue:
+            *_, placement = heapq.heappop(queue)
+            tournament = placement.tournament
+            component_ids = placement.component_ids
+            # Prefer the current court, then free slots to pushing others
+            courts_ids = sorted(
+                tournament.court_ids, key=lambda c: c != placement.court_id
+            )
+            options = []
+            for index, court_id in enumerate(courts_ids):
+                free_start = self.get_next_start(
+                    tournament, court_id, component_ids, placement.start
+                )
+                if free_start is not None:
+                    options.append((free_start, False, index, court_id))
+                push_start = self.get_next_start(
+                    tournament,
+                    court_id,
+                    component_ids,
+                    placement.start,
+                    is_ignored=is_pushable,
+                )
+                if push_start is not None and (
+                    free_start is None or push_start < free_start
+                ):
+                    options.append((push_start, True, index, court_id))
+            if not options:
+                return None
+            start, _push, _index, court_id = min(options)
+            end = start + tournament.duration
+            for blocker in self.get_blockers(
+                court_id, component_ids, start, end, tournament.min_rest
+            ):
+                self.remove_placement(blocker)
+                heapq.heappush(queue, (blocker.start, next(sequence), blocker))
+            placement.court_id, placement.start, placement.end = court_id, start, end
+            self.add_placement(placement)
+            fixed.add(placement)
+            rescheduled.append(placement)
+        return rescheduled
+
+    def place(self, tournament, team_ids, component_ids, deadline=None):
+        """
+        Schedule a match between `team_ids` as soon as possible.
+
+        If there is no room for the match and a `deadline` is provided,
+        other placed matches are moved to make room for it
+        until :func:`time.monotonic` reaches `deadline`.
+
+        :return: the :class:`Placement` of the match
+            or None if the match can't be scheduled.
+        """
+        placement = Placement(
+            tournament_id=tournament.id,
+            team_ids=tuple(team_ids),
+            court_id=None,
+            start=None,
+            end=None,
+            component_ids=frozenset(component_ids),
+            tournament=tournament,
+        )
+        if self.fit(placement):
+            return placement
+        if deadline is None:
+            return None
+        self.journal = []
+        try:
+            placed = self.repair(placement, deadline)
+        finally:
+            self.journal = None
+        return placement if placed else None
+
+
+class ScheduleOptimizer:
+    """
+    Simulated annealing over the placements of a :class:`Scheduler`.
+
+    Placements are moved to other free slots or swapped with each other,
+    worse schedules are accepted with a probability
+    that decreases as the deadline approaches.
+    Lower is better for the cost, that sums:
+
+    - the end of the last placement (makespan),
+    - the idle time of the courts between their first and last placement,
+    - a penalty for each component playing two placements back to back.
+
+    Times are measured in minutes.
+    """
+
+    IDLE_WEIGHT = 0.5
+    BACK_TO_BACK_WEIGHT = 30
+    TEMPERATURE_RATIO = 0.05
+
+    def __init__(self, scheduler, placements, rng=None):
+        """
+        :param scheduler: a scheduler where `placements` have been added.
+        :param placements: the placements that can be moved.
+        """
+        self.scheduler = scheduler
+        self.placements = list(placements)
+        self.rng = rng or random.Random()
+        self.origin = min(
+            (placement.tournament.min_start for placement in self.placements),
+            default=None,
+        )
+
+    def minutes(self, moment):
+        return (moment - self.origin).total_seconds() / 60
+
+    def cost(self):
+        if not self.placements:
+            return 0
+        makespan = max(self.minutes(placement.end) for placement in self.placements)
+
+        courts_placements = defaultdict(list)
+        components_placements = defaultdict(list)
+        for placement in self.placements:
+            courts_placements[placement.court_id].append(placement)
+            for component_id in placement.component_ids:
+                components_placements[component_id].append(placement)
+
+        idle = 0
+        for court_placements in courts_placements.values():
+            span = self.minutes(max(p.end for p in court_placements)) - self.minutes(
+                min(p.start for p in court_placements)
+            )
+            busy = sum((p.end - p.start).total_seconds() / 60 for p in court_placements)
+            idle += span - busy
+
+        back_to_back = 0
+        for component_placements in components_placements.values():
+            component_placements.sort(key=lambda p: p.start)
+            for index in range(1, len(component_placements)):
+                previous_end = component_placements[index - 1].end
+                if component_placements[index].start <= previous_end:
+                    back_to_back += 1
+
+        return (
+            makespan + self.IDLE_WEIGHT * idle + self.BACK_TO_BACK_WEIGHT * back_to_back
+        )
+
+    def get_random_slot(self, placement):
+        """
+        A random (court, start) in the grid of the tournament of `placement`,
+        half of the times not later than `placement`.
+        """
+        tournament = placement.tournament
+        duration = tournament.duration
+        last_step = (tournament.max_start - tournament.min_start) // duration
+        if self.rng.random() < 0.5:
+            last_step = min(
+                last_step, (placement.start - tournament.min_start) // duration
+            )
+        start = tournament.min_start + duration * self.rng.randint(0, max(last_step, 0))
+        return self.rng.choice(tournament.court_ids), start
+
+    def can_move(self, placement, court_id, start):
+        tournament = placement.tournament
+        if court_id not in self.scheduler.courts:
+            return False
+        if court_id not in tournament.court_ids:
+            return False
+        if not tournament.min_start <= start <= tournament.max_start:
+            return False
+        end = start + (placement.end - placement.start)
+        return self.scheduler.can_place(
+            court_id,
+            placement.component_ids,
+            start,
+            end,
+            placement.tournament.min_rest,
+        )
+
+    def move(self, placement, court_id, start):
+        placement.end = start + (placement.end - placement.start)
+        placement.court_id, placement.start = court_id, start
+        self.scheduler.add_placement(placement)
+
+    def relocate(self):
+        """Move a random placement to a random free slot."""
+        placement = self.rng.choice(self.placements)
+        court_id, start = self.get_random_slot(placement)
+        self.scheduler.remove_placement(placement)
+        if self.can_move(placement, court_id, start):
+            self.move(placement, court_id, start)
+            return True
+        return False
+
+    def swap(self):
+        """Exchange the slots of two random placements."""
+        placement, other_placement = self.rng.sample(self.placements, 2)
+        self.scheduler.remove_placement(placement)
+        self.scheduler.remove_placement(other_placement)
+        court_id, start = placement.court_id, placement.start
+        other_court_id, other_start = other_placement.court_id, other_placement.start
+        if not self.can_move(placement, other_court_id, other_start):
+            return False
+        self.move(placement, other_court_id, other_start)
+        if not self.can_move(other_placement, court_id, start):
+            return False
+        self.move(other_placement, court_id, start)
+        return True
+
+    def run(self, deadline):
+        """
+        Improve the placements until :func:`time.monotonic` reaches `deadline`.
+
+        Placements are left in the best schedule found.
+
+        :return: the (initial cost, best cost) tuple.
+        """
+        initial_cost = current_cost = best_cost = self.cost()
+        if len(self.placements) < 2:
+            return initial_cost, best_cost
+        best_slots = [(p.court_id, p.start, p.end) for p in self.placements]
+        initial_temperature = max(initial_cost * self.TEMPERATURE_RATIO, 1)
+        start_time = time.monotonic()
+        duration = max(deadline - start_time, 1e-6)
+        self.scheduler.journal = []
+        try:
+            while True:
+                now = time.monotonic()
+                if now >= deadline:
+                    break
+                temperature = initial_temperature * (1 - (now - start_time) / duration)
+                del self.scheduler.journal[:]
+                moved = self.swap() if self.rng.random() < 0.5 else self.relocate()
+                if not moved:
+                    self.scheduler.rollback(0)
+                    continue
+                cost = self.cost()
+                delta = cost - current_cost
+                if delta <= 0 or self.rng.random() < math.exp(
+                    -delta / max(temperature, 1e-9)
+                ):
+                    current_cost = cost
+                    if cost < best_cost:
+                        best_cost = cost
+                        best_slots = [
+                            (p.court_id, p.start, p.end) for p in self.placements
+                        ]
+                else:
+                    self.scheduler.rollback(0)
+        finally:
+            self.scheduler.journal = None
+
+        # Restore the best schedule
+        for placement in self.placements:
+            self.scheduler.remove_placement(placement)
+        for index, placement in enumerate(self.placements):
+            placement.court_id, placement.start, placement.end = best_slots[index]
+            self.scheduler.add_placement(placement)
+        return initial_cost, best_cost
+
+
+def independent_groups(items_resources):
+    """
+    Split items into groups that share no resources.
+
+    :param items_resources: mapping from an item
+        to the hashable resources it uses.
+    :return: a list of lists of items,
+        two items using the same resource are in the same group.
+    """
+    parents = {}
+
+    def find(node):
+        parents.setdefault(node, node)
+        while parents[node] != node:
+            parents[node] = parents[parents[node]]
+            node = parents[node]
+        return node
+
+    for item, resources in items_resources.items():
+        item_root = find(("item", item))
+        for resource in resources:
+            resource_root = find(("resource", resource))
+            if resource_root != item_root:
+                parents[resource_root] = item_root
+
+    groups = defaultdict(list)
+    for item in items_resources:
+        groups[find(("item", item))].append(item)
+    return list(groups.values())
+
+
+class SpecsCache(dict):
+    """Dictionary computing missing values with `get_value`."""
+
+    def __init__(self, get_value):
+        super().__init__()
+        self.get_value = get_value
+
+    def __missing__(self, key):
+        value = self[key] = self.get_value(key)
+        return value
+
+
+@dataclass
+class SchedulingProblem:
+    """
+    Everything needed to schedule a stream of candidate matches.
+
+    Candidates are ((team IDs, payload), components IDs, round number,
+    tournament ID) tuples, see :class:`MatchFrontier`;
+    the payload is returned along with the placement of the match.
+    Busy intervals are (court ID, components IDs, start, end, key) tuples
+    of the existing matches, see :meth:`Scheduler.add_busy`.
+    Components windows map components IDs to their availability windows,
+    see :meth:`Scheduler.set_component_windows`.
+    The seed makes randomized schedules reproducible.
+    Inputs are plain data the candidates are generated from,
+    solutions of problems having inputs are cached, see :func:`solve_cached`.
+    """
+
+    courts: list
+    tournaments: dict
+    candidates: object
+    busy: list = field(default_factory=list)
+    components_windows: dict = field(default_factory=dict)
+    weights: dict = None
+    randomize: bool = False
+    time_budget: float = 0
+    seed: str = None
+    inputs: object = None
+
+
+def solve(problem):
+    """
+    Schedule the candidates of `problem`.
+
+    Only uses plain data, so that it can run in a worker process.
+
+    :return: a (placements, unplaced payload) tuple
+        where placements is a list of (payload, :class:`Placement`) tuples
+        and unplaced payload is the payload of the first candidate
+        that could not be scheduled, or None if all of them were scheduled.
+    """
+    scheduler = Scheduler(problem.courts)
+    for court_id, component_ids, start, end, key in problem.busy:
+        scheduler.add_busy(court_id, component_ids, start, end, key=key)
+    for component_id, windows in problem.components_windows.items():
+        scheduler.set_component_windows(component_id, windows)
+    # Share time slots between tournaments, play rounds in order
+    # and try to not make components play two matches in a row
+    frontier = MatchFrontier(
+        problem.candidates,
+        scheduler.last_played,
+        rng=random.Random(problem.seed) if problem.randomize else None,
+        weights=problem.weights,
+    )
+    deadline = None
+    if problem.time_budget > 0:
+        deadline = time.monotonic() + problem.time_budget
+    placements = []
+    while frontier:
+        (teams_ids, payload), components_ids, _round, tournament_id = frontier.pop()
+        placement = scheduler.place(
+            problem.tournaments[tournament_id],
+            teams_ids,
+            components_ids,
+            deadline=deadline,
+        )
+        if placement is None:
+            return placements, payload
+        placements.append((payload, placement))
+    return placements, None
+
+
+SOLUTIONS_CACHE_SIZE = 16
+
+
+class SolutionsCache(OrderedDict):
+    """Solutions of the last solved problems, by key of the problem."""
+
+    def __init__(self, size=SOLUTIONS_CACHE_SIZE):
+        super().__init__()
+        self.size = size
+
+    def get(self, key, default=None):
+        if key not in self:
+            return default
+        self.move_to_end(key)
+        return self[key]
+
+    def put(self, key, solution):
+        self[key] = solution
+        self.move_to_end(key)
+        while len(self) > self.size:
+            self.popitem(last=False)
+
+
+SOLUTIONS_CACHE = SolutionsCache()
+
+
+def sorted_repr(values):
+    return sorted(repr(value) for value in values)
+
+
+def get_problem_key(problem):
+    """
+    Hash of everything that changes the solution of `problem`:
+    its inputs, courts, windows and existing matches.
+
+    Candidates are not consumed: they must be generated from the inputs.
+    Keys of busy intervals are ignored.
+    """
+    key_data = (
+        repr(problem.inputs),
+        sorted_repr(problem.courts),
+        sorted_repr(
+            (court_id, sorted(components_ids), start, end)
+            for court_id, components_ids, start, end, _key in problem.busy
+        ),
+        sorted_repr(problem.components_windows.items()),
+        sorted_repr((problem.weights or {}).items()),
+        problem.randomize,
+        problem.time_budget,
+        problem.seed,
+    )
+    return hashlib.sha256(repr(key_data).encode()).hexdigest()
+
+
+def index_candidates(candidates, payloads):
+    """
+    Lazily replace the payload of each candidate with its index in `payloads`,
+    that is filled as candidates are consumed.
+    """
+    for (teams_ids, payload), *candidate in candidates:
+        payloads.append(payload)
+        yield ((teams_ids, len(payloads) - 1), *candidate)
+
+
+def solve_cached(problems, map_function=map):
+    """
+    Solve each problem of `problems` as :func:`solve` does,
+    reusing the solution of an already solved problem having the same key,
+    see :func:`get_problem_key`.
+
+    Problems without inputs are not cached.
+    Only problems that could be solved completely are kept in cache.
+    A solution in cache is only reused if its placements
+    have the teams of the candidates of the problem,
+    otherwise the problem is solved again.
+
+    :param map_function: applies :func:`solve` to the problems not in cache,
+        the `map` of a process pool for instance.
+        Candidates of those problems are consumed lazily
+        and only carry plain data.
+    :return: a list of results of :func:`solve`, one for each problem.
+    """
+    keys = [
+        None if problem.inputs is None else get_problem_key(problem)
+        for problem in problems
+    ]
+    solutions = [key and SOLUTIONS_CACHE.get(key) for key in keys]
+    problems = list(problems)
+    for index, solution in enumerate(solutions):
+        if solution is None:
+            continue
+        candidates = list(problems[index].candidates)
+        problems[index] = dataclasses.replace(problems[index], candidates=candidates)
+        placements, _unplaced_index = solution
+        if len(placements) != len(candidates) or any(
+            placement.team_ids != tuple(candidates[candidate_index][0][0])
+            for candidate_index, placement in placements
+        ):
+            solutions[index] = None
+    missing = [index for index, solution in enumerate(solutions) if solution is None]
+    # Solutions refer to candidates by index, not by payload
+    payloads = [[] for _problem in problems]
+    indexed_problems = [
+        dataclasses.replace(
+            problems[index],
+            candidates=index_candidates(problems[index].candidates, payloads[index]),
+        )
+        for index in missing
+    ]
+    for missing_index, solution in enumerate(map_function(solve, indexed_problems)):
+        index = missing[missing_index]
+        solutions[index] = solution
+        if keys[index] is not None and solution[1] is None:
+            SOLUTIONS_CACHE.put(keys[index], solution)
+
+    results = []
+    for index, (placements, unplaced_index) in enumerate(solutions):
+        problem_payloads = payloads[index]
+        if not problem_payloads:
+            problem_payloads.extend(
+                payload
+                for (_teams_ids, payload), *_candidate in problems[index].candidates
+            )
+        results.append(
+            (
+                [
+                    (problem_payloads[candidate_index], placement)
+                    for candidate_index, placement in placements
+                ],
+                None if unplaced_index is None else problem_payloads[unplaced_index],
+            )
+        )
+    return results
+
+
+def diff_schedules(entries, other_entries, get_key):
+    """
+    Differences from the schedule of `entries` to the one of `other_entries`.
+
+    Entries having the same key are the same match,
+    rematches are paired in order.
+
+    :return: a tuple of
+        indexes of `entries` missing from `other_entries`,
+        indexes of `other_entries` missing from `entries`,
+        (index, other index) tuples of the matches scheduled differently.
+    """
+    keys_indexes = defaultdict(list)
+    for index, entry in enumerate(entries):
+        keys_indexes[get_key(entry)].append(index)
+    added = []
+    moved = []
+    for other_index, other_entry in enumerate(other_entries):
+        indexes = keys_indexes.get(get_key(other_entry))
+        if not indexes:
+            added.append(other_index)
+            continue
+        index = indexes.pop(0)
+        if entries[index] != other_entry:
+            moved.append((index, other_index))
+    removed = sorted(index for indexes in keys_indexes.values() for index in indexes)
+    return removed, added, moved
+
+
+def get_metrics(placements):
+    """
+    Quality of a schedule made of `placements`.
+
+    :return: a dictionary with
+        ``matches_nbr``,
+        ``time_start`` and ``time_end``: bounds of the schedule,
+        ``makespan``: hours between the bounds,
+        ``court_usage``: ratio of the makespan spent playing, on average per court,
+        ``idle_average`` and ``idle_max``: hours a component waits between matches,
+        ``back_to_back_nbr``: matches starting when the previous match
+        of one of their components ends.
+    """
+    metrics = {
+        "matches_nbr": len(placements),
+        "time_start": None,
+        "time_end": None,
+        "makespan": 0.0,
+        "court_usage": 0.0,
+        "idle_average": 0.0,
+        "idle_max": 0.0,
+        "back_to_back_nbr": 0,
+    }
+    if not placements:
+        return metrics
+    time_start = min(placement.start for placement in placements)
+    time_end = max(placement.end for placement in placements)
+    makespan = (time_end - time_start).total_seconds() / 3600
+    courts_played = defaultdict(float)
+    components_matches = defaultdict(list)
+    for placement in placements:
+        courts_played[placement.court_id] += (
+            placement.end - placement.start
+        ).total_seconds() / 3600
+        for component_id in placement.component_ids:
+            components_matches[component_id].append(placement)
+
+    idles = []
+    back_to_back = set()
+    for matches in components_matches.values():
+        matches.sort(key=lambda placement: placement.start)
+        for index in range(1, len(matches)):
+            idle = matches[index].start - matches[index - 1].end
+            idles.append(idle.total_seconds() / 3600)
+            if idle <= timedelta():
+                back_to_back.add(id(matches[index]))
+
+    metrics.update(
+        time_start=time_start,
+        time_end=time_end,
+        makespan=makespan,
+        back_to_back_nbr=len(back_to_back),
+    )
+    if makespan:
+        metrics["court_usage"] = sum(courts_played.values()) / (
+            makespan * len(courts_played)
+        )
+    if idles:
+        metrics.update(
+            idle_average=sum(idles) / len(idles),
+            idle_max=max(idles),
+        )
+    return metrics
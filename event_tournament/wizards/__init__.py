@@ -1,4 +1,6 @@
 #  Copyright 2019 ~ 2023 Simone Rubino <daemo00@gmail.com>
 #  License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
+from . import event_tournament_reschedule
+from . import event_tournament_simulation
 from . import import_csv_bv4w
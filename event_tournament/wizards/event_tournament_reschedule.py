@@ -0,0 +1,65 @@
+#  Copyright 2023 Simone Rubino <daemo00@gmail.com>
+#  License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+from datetime import timedelta
+
+from odoo import _, fields, models
+
+
+class EventTournamentReschedule(models.TransientModel):
+    _name = "event.tournament.reschedule"
+    _description = "Reschedule the matches of a court after a disruption"
+
+    court_id = fields.Many2one(
+        comodel_name="event.tournament.court",
+        string="Court",
+        required=True,
+    )
+    disruption = fields.Selection(
+        selection=[
+            ("delay", "Delay"),
+            ("shift", "Shift"),
+            ("closure", "Closure"),
+        ],
+        required=True,
+        default="delay",
+        help="Delay: the court is busy for some more time.\n"
+        "Shift: all the following matches of the court are delayed.\n"
+        "Closure: the court can't be used anymore, "
+        "or until the end of the closure.",
+    )
+    time_start = fields.Datetime(
+        string="From",
+        required=True,
+        default=fields.Datetime.now,
+        help="Matches starting from this time are rescheduled if needed.",
+    )
+    delay_duration = fields.Float(
+        string="Delay",
+        help="Time in hours the court is busy for.",
+    )
+    time_end = fields.Datetime(
+        string="Until",
+        help="Leave empty if the court closes indefinitely.",
+    )
+
+    def get_time_end(self):
+        self.ensure_one()
+        if self.disruption == "delay":
+            return self.time_start + timedelta(hours=self.delay_duration)
+        return self.time_end or None
+
+    def reschedule(self):
+        self.ensure_one()
+        matches = self.court_id.reschedule_matches(self.time_start, self.get_time_end())
+        return {
+            "type": "ir.actions.client",
+            "tag": "display_notification",
+            "params": {
+                "title": _("Rescheduling"),
+                "message": _("{matches_nbr} matches have been moved.").format(
+                    matches_nbr=len(matches)
+                ),
+                "type": "success" if matches else "info",
+                "next": {"type": "ir.actions.act_window_close"},
+            },
+        }
@@ -0,0 +1,158 @@
+#  Copyright 2023 Simone Rubino <daemo00@gmail.com>
+#  License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import api, fields, models
+from odoo.exceptions import UserError
+
+VARIANT_FIELDS = [
+    "match_duration",
+    "match_warm_up_duration",
+    "min_rest_duration",
+    "randomize_matches_generation",
+    "random_seed",
+]
+
+
+class EventTournamentSimulation(models.TransientModel):
+    _name = "event.tournament.simulation"
+    _description = "Compare schedules of a tournament without generating matches"
+
+    tournament_id = fields.Many2one(
+        comodel_name="event.tournament",
+        string="Tournament",
+        required=True,
+    )
+    variant_ids = fields.One2many(
+        comodel_name="event.tournament.simulation.variant",
+        inverse_name="simulation_id",
+        string="Variants",
+    )
+
+    @api.model
+    def default_get(self, fields_list):
+        res = super().default_get(fields_list)
+        tournament = self.env["event.tournament"].browse(res.get("tournament_id"))
+        if tournament and "variant_ids" in fields_list:
+            res["variant_ids"] = [
+                fields.Command.create(
+                    {
+                        "name": tournament.display_name,
+                        **{
+                            field_name: tournament[field_name]
+                            for field_name in VARIANT_FIELDS
+                        },
+                        "court_ids": [fields.Command.set(tournament.court_ids.ids)],
+                    }
+                )
+            ]
+        return res
+
+    def simulate(self):
+        self.ensure_one()
+        self.variant_ids.simulate()
+        return {
+            "type": "ir.actions.act_window",
+            "res_model": self._name,
+            "res_id": self.id,
+            "view_mode": "form",
+            "target": "new",
+        }
+
+
+class EventTournamentSimulationVariant(models.TransientModel):
+    _name = "event.tournament.simulation.variant"
+    _description = "Settings and resulting schedule of a simulation"
+
+    simulation_id = fields.Many2one(
+        comodel_name="event.tournament.simulation",
+        required=True,
+        ondelete="cascade",
+    )
+    name = fields.Char()
+    match_duration = fields.Float(
+        help="Duration in hours.",
+    )
+    match_warm_up_duration = fields.Float(
+        help="Duration in hours.",
+    )
+    min_rest_duration = fields.Float(
+        help="Duration in hours.",
+    )
+    randomize_matches_generation = fields.Boolean()
+    random_seed = fields.Integer(
+        string="Seed",
+    )
+    court_ids = fields.Many2many(
+        comodel_name="event.tournament.court",
+        string="Courts",
+    )
+    error = fields.Text(
+        readonly=True,
+    )
+    matches_nbr = fields.Integer(
+        string="Matches",
+        readonly=True,
+    )
+    time_end = fields.Datetime(
+        string="End",
+        readonly=True,
+    )
+    makespan = fields.Float(
+        readonly=True,
+        help="Hours between the first and the last match.",
+    )
+    court_usage = fields.Float(
+        readonly=True,
+        help="Ratio of time courts are used for matches.",
+    )
+    idle_average = fields.Float(
+        string="Average wait",
+        readonly=True,
+        help="Hours a component waits between two matches, on average.",
+    )
+    back_to_back_nbr = fields.Integer(
+        string="Back to back",
+        readonly=True,
+        help="Matches starting when the previous match "
+        "of one of their components ends.",
+    )
+
+    def get_scheduling_variant(self):
+        self.ensure_one()
+        return {
+            **{field_name: self[field_name] for field_name in VARIANT_FIELDS},
+            "court_ids": self.court_ids.ids,
+        }
+
+    def simulate(self):
+        for variant in self:
+            tournament = variant.simulation_id.tournament_id.with_context(
+                scheduling_variant=variant.get_scheduling_variant(),
+            )
+            try:
+                simulation = tournament.simulate_matches()
+            except UserError as error:
+                variant.update(
+                    {
+                        "error": str(error),
+                        "matches_nbr": 0,
+                        "time_end": False,
+                        "makespan": 0,
+                        "court_usage": 0,
+                        "idle_average": 0,
+                        "back_to_back_nbr": 0,
+                    }
+                )
+                continue
+            metrics = simulation["metrics"]
+            variant.update(
+                {
+                    "error": False,
+                    "matches_nbr": metrics["matches_nbr"],
+                    "time_end": metrics["time_end"] or False,
+                    "makespan": metrics["makespan"],
+                    "court_usage": metrics["court_usage"],
+                    "idle_average": metrics["idle_average"],
+                    "back_to_back_nbr": metrics["back_to_back_nbr"],
+                }
+            )